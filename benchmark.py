@@ -0,0 +1,256 @@
+"""
+Created on October 18, 2026
+"""
+from geecq.fastqc import Fastqc
+from geecq.sam import Sam
+from geecq.meta import Meta
+from geecq.table import Table
+from geecq.graph import GraphMaker
+from geecq.render import r_script, write_plot_data
+import cPickle as pickle
+import getopt
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOTDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test')
+DEFAULT_SIZES = [100, 1000, 10000]
+GRAPHS = ['per_base_qual', 'per_sequence_qual', 'seq_len', 'duplication']
+STAGES = ['fastqc', 'sam', 'meta', 'cohort', 'table'] + \
+    ['graph_' + graph for graph in GRAPHS]
+
+class ScriptRenderer(object):
+    """Writes the data and R script of each plot without running R
+    """
+    def __init__(self, path):
+        self.path = path
+        self.nb_plots = 0
+
+    def draw(self, plots):
+        for plot in plots:
+            data_path = os.path.join(self.path, '%d.bin' % self.nb_plots)
+            write_plot_data(plot, data_path)
+            r_script(plot, self.nb_plots, data_path)
+            self.nb_plots += 1
+        return dict((plot.path, ('ok', None)) for plot in plots)
+
+
+def read_fixture(name):
+    """Returns:
+        the content of a file of test/
+    """
+    with open(os.path.join(ROOTDIR, name), 'r') as fixture:
+        return fixture.read()
+
+
+def meta_fixture():
+    """Returns:
+        the first sample of test/series.soft as a meta data file
+    """
+    text = read_fixture('series.soft')
+    start = text.index('^SAMPLE')
+    return text[start:text.index('^SAMPLE', start + 1)]
+
+
+def cohort(nb_samples):
+    """Synthesises the rows of nb_samples samples from the fixtures, each
+    sample has its own objects
+
+    Returns:
+        A list of lists of format (fastqc, fastqc, sam, meta)
+    """
+    templates = []
+    for name, sam_name in [('fastqc_v10.txt', 'samstat_v1.html'),
+                           ('fastqc_v11.txt', 'samstat_v2.html')]:
+        fastqc = Fastqc()
+        fastqc.load_from_string(read_fixture(name))
+        #the samples are copies of decoded objects, as after --jobs
+        fastqc.decode_all()
+        sam = Sam()
+        sam.load_from_string(read_fixture(sam_name))
+        meta = Meta('')
+        meta.load_from_string(meta_fixture())
+        templates.append(pickle.dumps([fastqc, fastqc, sam, meta],
+                                      pickle.HIGHEST_PROTOCOL))
+    rows = []
+    for i in range(nb_samples):
+        row = pickle.loads(templates[i % 2])
+        for obj in row:
+            obj.name = 'sample%06d' % i
+        rows.append(row)
+    return rows
+
+
+def run_stage(stage, nb_samples):
+    """Runs one stage on a synthetic cohort, in the current process
+
+    Returns:
+        dict with the time of the stage, its throughput (samples per
+        second) and the peak resident memory of the process (KB)
+    """
+    temp_dir = None
+    if stage in ['fastqc', 'sam', 'meta']:
+        cls, loader, texts = {
+            'fastqc': (Fastqc, 'load_from_string',
+                       [read_fixture('fastqc_v10.txt'),
+                        read_fixture('fastqc_v11.txt')]),
+            'sam': (Sam, 'load_from_string',
+                    [read_fixture('samstat_v1.html'),
+                     read_fixture('samstat_v2.html')]),
+            'meta': (Meta, 'load_from_string', [meta_fixture()])}[stage]
+        args = ('',) if cls is Meta else ()
+        objects = []
+
+        def task():
+            for i in xrange(nb_samples):
+                obj = cls(*args)
+                getattr(obj, loader)(texts[i % len(texts)])
+                if cls is Fastqc:
+                    #the whole parse, the modules are otherwise decoded
+                    #on first use
+                    obj.decode_all()
+                objects.append(obj)
+    elif stage == 'cohort':
+        rows = []
+
+        def task():
+            rows.extend(cohort(nb_samples))
+    elif stage == 'table':
+        rows = cohort(nb_samples)
+
+        def task():
+            Table(rows).make_tables()
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='geecq')
+        renderer = ScriptRenderer(temp_dir)
+        graph_maker = GraphMaker([row[0] for row in cohort(nb_samples)],
+                                 temp_dir + '/', renderer)
+        builder = getattr(graph_maker, '%s_plot' % stage[len('graph_'):])
+
+        def task():
+            renderer.draw([builder()])
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    try:
+        task()
+    finally:
+        seconds = time.time() - start
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir)
+    return {'stage': stage,
+            'samples': nb_samples,
+            'seconds': seconds,
+            'samples_per_second': nb_samples / seconds if seconds else None,
+            'rss_before_kb': rss_before,
+            'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+
+
+def git_commit():
+    """Returns:
+        the current git commit of the repository, None outside of git
+    """
+    try:
+        process = subprocess.Popen(['git', 'rev-parse', 'HEAD'],
+                                   cwd=os.path.dirname(ROOTDIR),
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        output = process.communicate()[0].strip()
+    except OSError:
+        return None
+    return output if process.returncode == 0 else None
+
+
+def benchmark(sizes, stages, output_file):
+    """Runs each stage for each size in its own process, so that the peak
+    memory of a stage is not hidden by the ones before it, and writes the
+    results to output_file as JSON
+
+    Args:
+        sizes: list of numbers of samples
+        stages: list of stages, see STAGES
+        output_file: path of the JSON file
+    """
+    results = []
+    for nb_samples in sizes:
+        for stage in stages:
+            process = subprocess.Popen([sys.executable,
+                                        os.path.abspath(__file__),
+                                        '--run-stage', stage,
+                                        '-n', str(nb_samples)],
+                                       stdout=subprocess.PIPE)
+            output = process.communicate()[0]
+            if process.returncode != 0:
+                print 'Stage %s failed for %d samples' % (stage, nb_samples)
+                continue
+            result = json.loads(output.strip().split('\n')[-1])
+            print '%-26s %6d samples %9.3f s %10.1f samples/s %8d KB' % (
+                stage, nb_samples, result['seconds'],
+                result['samples_per_second'] or 0, result['peak_rss_kb'])
+            results.append(result)
+    with open(output_file, 'w') as json_file:
+        json.dump({'commit': git_commit(),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                   'results': results}, json_file, indent=2)
+
+
+def usage():
+    """Prints the proper usage for benchmark.py
+    """
+    print 'Usage: python benchmark.py [-n 100,1000,10000] ' \
+          '[--stages fastqc,sam,...] [-o benchmark.json]'
+
+
+def main(argv):
+    """Times the parsers, the table builder and the graph script builders
+    on synthetic cohorts made from the files of test/
+
+        -n: comma separated numbers of samples, defaults to 100,1000,10000
+        --stages: comma separated stages among fastqc, sam, meta, cohort
+            (memory held by the rows of the samples), table,
+            graph_per_base_qual, graph_per_sequence_qual, graph_seq_len and
+            graph_duplication, defaults to all of them
+        -o: JSON file receiving the results, defaults to benchmark.json
+        --help(-h): prints proper usage syntax
+    """
+    sizes = DEFAULT_SIZES
+    stages = STAGES
+    output_file = 'benchmark.json'
+    run = None
+    try:
+        opts, _ = getopt.getopt(argv, "hn:o:",
+                                ["help", "stages=", "run-stage="])
+        for opt, arg in opts:
+            if opt in ["-h", "--help"]:
+                usage()
+                sys.exit()
+            elif opt == "-n":
+                sizes = [int(size) for size in arg.split(',')]
+            elif opt == "-o":
+                output_file = arg
+            elif opt == "--stages":
+                stages = arg.split(',')
+            elif opt == "--run-stage":
+                run = arg
+    except (getopt.GetoptError, ValueError):
+        usage()
+        sys.exit(2)
+    if any(stage not in STAGES for stage in stages + [run or 'table']):
+        usage()
+        sys.exit(2)
+
+    if run is not None:
+        print json.dumps(run_stage(run, sizes[0]))
+    else:
+        benchmark(sizes, stages, output_file)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,122 @@
+"""
+Created on October 18, 2026
+"""
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'geecq')
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+class ParseCache(object):
+    """Keeps the parsed Fastqc/Sam/Meta objects on disk between runs
+
+    Each entry is the pickled object along with the size and mtime of the
+    file it was parsed from and the PARSER_VERSION of its class, an entry
+    is only used when all of those still match. A hit only stats the
+    source file, it is never opened.
+
+    Attributes:
+        path: directory holding the cache entries
+        max_size: maximal total size of the entries (bytes), the least
+            recently used entries are removed by prune()
+    """
+    def __init__(self, path=DEFAULT_PATH, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def entry_path_(self, obj, file_name, loader):
+        """Path of the entry holding file_name parsed by obj.loader
+        """
+        key = '%s.%s:%s' % (type(obj).__name__, loader,
+                            os.path.abspath(file_name))
+        return os.path.join(self.path, hashlib.sha1(key).hexdigest())
+
+    def load(self, obj, file_name, loader):
+        """Loads file_name into obj, from the cache when possible
+
+        Args:
+            obj: empty Fastqc, Sam or Meta object
+            file_name: path to the file to load
+            loader: name of the method of obj used to load file_name
+                ex: 'load_from_zip'
+
+        Returns:
+            the loaded object, either obj or its copy from the cache
+        """
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            getattr(obj, loader)(file_name)
+            return obj
+        stamp = (stat.st_size, stat.st_mtime, type(obj).PARSER_VERSION)
+        entry_path = self.entry_path_(obj, file_name, loader)
+        try:
+            with open(entry_path, 'rb') as entry:
+                entry_stamp, cached = pickle.load(entry)
+            if entry_stamp == stamp:
+                os.utime(entry_path, None)
+                return cached
+        except (IOError, OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, TypeError):
+            #entries of classes whose attributes changed fail to unpickle
+            pass
+        getattr(obj, loader)(file_name)
+        if has_data(obj):
+            self.write_entry_(entry_path, stamp, obj)
+        return obj
+
+    def write_entry_(self, entry_path, stamp, obj):
+        """Writes an entry atomically so that concurrent runs or workers
+        never read a partial entry
+        """
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(handle, 'wb') as entry:
+                pickle.dump((stamp, obj), entry, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            print 'Could not write cache entry ' + entry_path
+
+    def prune(self):
+        """Removes the least recently used entries until the cache fits
+        in max_size
+        """
+        entries = []
+        for name in os.listdir(self.path):
+            entry_path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+        total = sum(entry[1] for entry in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(entry_path)
+                total -= size
+            except OSError:
+                pass
+
+
+def has_data(obj):
+    """Tells whether a loader filled obj, the loaders print an error and
+    leave the object empty when a file cannot be read, such objects are
+    not cached so that the error is reported again on the next run
+
+    Args:
+        obj: Fastqc, Sam, Meta or MetaSeries object
+
+    Returns:
+        True if obj holds data from its file
+    """
+    if hasattr(obj, 'samples'):
+        return bool(obj.samples)
+    if hasattr(obj, 'meta'):
+        return bool(obj.meta)
+    return bool(obj.name)
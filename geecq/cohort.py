@@ -0,0 +1,211 @@
+"""
+Created on October 18, 2026
+"""
+import geecq.others as others
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class Cohort(object):
+    """Metrics of many Fastqc objects as padded 2-D numpy arrays
+
+    The arrays hold one column per fastqc object and are summed with
+    ordered_sum, which adds the values in the same order as sum() does on
+    the lists of a single Fastqc and so gives the same floats
+
+    Attributes:
+        size: number of fastqc objects
+        pos_quality: per base quality, padded with 0
+        pos_quality_len: len(pos_quality) of each fastqc
+        qual: number of sequences per quality score, padded with 0
+        min_length: length of the first row of seq_length
+        seq_length: number of sequences per length from min_length,
+            padded with 0
+        seq_length_start: shortest length of each fastqc
+        seq_length_len: len(seq_length.counts) of each fastqc
+        dup: duplication levels, padded with 0
+        dup_len: len(dup) of each fastqc
+    """
+    def __init__(self, fastqc_list):
+        self.size = len(fastqc_list)
+        self.pos_quality, self.pos_quality_len = \
+            padded([fastqc.pos_quality for fastqc in fastqc_list])
+        self.qual, self.qual_len = padded([fastqc.qual
+                                           for fastqc in fastqc_list])
+        self.dup, self.dup_len = padded([fastqc.dup for fastqc in fastqc_list])
+
+        seq_lengths = [fastqc.seq_length for fastqc in fastqc_list]
+        starts = [seq_length.min_length for seq_length in seq_lengths
+                  if seq_length.min_length is not None]
+        self.min_length = min(starts) if starts else 0
+        self.seq_length_start = numpy.array(
+            [self.min_length if seq_length.min_length is None
+             else seq_length.min_length for seq_length in seq_lengths],
+            dtype=int)
+        self.seq_length_len = numpy.array(
+            [len(seq_length.counts) for seq_length in seq_lengths],
+            dtype=int)
+        end = (self.seq_length_start + self.seq_length_len).max() \
+            if self.size else self.min_length
+        self.seq_length = numpy.zeros((max(1, end - self.min_length),
+                                       self.size))
+        scatter(self.seq_length,
+                [seq_length.counts for seq_length in seq_lengths],
+                self.seq_length_len,
+                self.seq_length_start - self.min_length)
+
+    def short_stats(self):
+        """Computes the statistics of the short table for all fastqc
+        objects at once
+
+        Returns:
+            a list with the dict of short_stats() of each fastqc
+        """
+        columns = numpy.arange(self.size)
+        #fastqc objects without a module give nan, they are skipped below
+        errstate = numpy.seterr(divide='ignore', invalid='ignore')
+
+        nb_first = numpy.minimum(self.pos_quality_len, 10)
+        first_10 = ordered_sum(self.pos_quality[:10]) / nb_first
+        positions = self.pos_quality_len - 10 + numpy.arange(10)[:, None]
+        last = numpy.where(positions >= 0,
+                           self.pos_quality[positions.clip(0), columns], 0.0)
+        last_10 = ordered_sum(last) / nb_first
+
+        qual_mode = self.qual.argmax(axis=0)
+        qual_share = self.qual[qual_mode, columns] / ordered_sum(self.qual)
+
+        length_index = self.seq_length.argmax(axis=0)
+        length_share = self.seq_length[length_index, columns] / \
+            ordered_sum(self.seq_length)
+        numpy.seterr(**errstate)
+        #without any sequence the first length of the fastqc is the mode
+        length_mode = numpy.where(
+            self.seq_length[length_index, columns] > 0,
+            self.min_length + length_index, self.seq_length_start)
+
+        dup_total = self.dup[0]
+
+        #python floats and ints, converted once for the whole cohort
+        values = zip(self.pos_quality_len.tolist(), first_10.tolist(),
+                      last_10.tolist(), self.qual_len.tolist(),
+                      qual_mode.tolist(), qual_share.tolist(),
+                      self.seq_length_len.tolist(), length_mode.tolist(),
+                      length_share.tolist(), self.dup_len.tolist(),
+                      dup_total.tolist())
+        stats = []
+        for (pos_quality_len, first, last, qual_len, mode, share, length_len,
+             length, length_part, dup_len, dup) in values:
+            stat = dict.fromkeys(STATS)
+            if pos_quality_len:
+                stat['first_10'] = first
+                stat['last_10'] = last
+            if qual_len:
+                stat['qual_mode'] = mode
+                stat['qual_mode_share'] = share
+            if length_len:
+                stat['length_mode'] = length
+                stat['length_mode_share'] = length_part
+            if dup_len:
+                stat['dup_total'] = dup
+            stats.append(stat)
+        return stats
+
+
+#keys of the dicts returned by short_stats
+STATS = ['first_10', 'last_10', 'qual_mode', 'qual_mode_share',
+         'length_mode', 'length_mode_share', 'dup_total']
+
+
+def padded(containers):
+    """Stacks containers of numbers as the columns of a 2-D array
+
+    Returns:
+        (array, lengths), array is padded with 0 and lengths holds the
+        length of each container
+    """
+    lengths = numpy.array([len(container) for container in containers],
+                          dtype=int)
+    array = numpy.zeros((max(1, lengths.max() if len(lengths) else 0),
+                         len(containers)))
+    scatter(array, containers, lengths, numpy.zeros(len(containers), int))
+    return array, lengths
+
+
+def scatter(array, containers, lengths, offsets):
+    """Copies each container in its column of array, from its offset,
+    with a single numpy assignment
+
+    Args:
+        containers: sequences of numbers, see double_bytes
+    """
+    if not lengths.sum():
+        return
+    flat = numpy.frombuffer(''.join(double_bytes(container)
+                                    for container in containers), float)
+    starts = numpy.cumsum(lengths) - lengths
+    rows = numpy.arange(len(flat)) - numpy.repeat(starts - offsets, lengths)
+    array[rows, numpy.repeat(numpy.arange(len(containers)), lengths)] = flat
+
+
+def double_bytes(container):
+    """Returns:
+        the values of container as C doubles, the bytes of an array('d')
+        are read as they are and any other sequence, such as a list set
+        through the Fastqc setters, is converted first
+    """
+    if getattr(container, 'typecode', None) != 'd':
+        container = array.array('d', container)
+    return container.tostring()
+
+
+def ordered_sum(array):
+    """Sums the rows of a 2-D array one after the other
+
+    numpy's own sum may add the values pairwise, which rounds differently
+    than sum() on a list
+    """
+    total = numpy.zeros(array.shape[1])
+    for row in array:
+        total += row
+    return total
+
+
+def short_stats(fastqc):
+    """Computes the statistics of the short table for one fastqc object
+
+    Returns:
+        a dict with the keys of STATS, a value is None when its module is
+        missing from the fastqc
+    """
+    stat = dict.fromkeys(STATS)
+    if fastqc.pos_quality:
+        stat['first_10'] = others.mean(fastqc.pos_quality[:10])
+        stat['last_10'] = others.mean(fastqc.pos_quality[-10:])
+    if fastqc.qual:
+        i = others.argmax(fastqc.qual)
+        stat['qual_mode'] = i
+        stat['qual_mode_share'] = fastqc.qual[i]/sum(fastqc.qual)
+    if fastqc.seq_length:
+        counts = fastqc.seq_length.counts
+        i = others.argmax(counts)
+        stat['length_mode'] = fastqc.seq_length.min_length + i
+        stat['length_mode_share'] = counts[i]/sum(counts)
+    if fastqc.dup:
+        stat['dup_total'] = fastqc.dup[0]
+    return stat
+
+
+def cohort_short_stats(fastqc_list):
+    """Computes the statistics of the short table for many fastqc objects,
+    vectorized with numpy when it is installed
+
+    Returns:
+        a list with the dict of short_stats() of each fastqc
+    """
+    if numpy is None or not fastqc_list:
+        return [short_stats(fastqc) for fastqc in fastqc_list]
+    return Cohort(fastqc_list).short_stats()
@@ -0,0 +1,191 @@
+"""
+Created on October 18, 2026
+"""
+from array import array
+import os
+import struct
+import sys
+import tempfile
+import zipfile
+
+#columns of the long table holding text, the others are numbers
+TEXT_COLUMNS = [0, 5, 6, 7, 8, 9]
+NB_HEADERS = 3
+#size of the header of the metrics array, the shape is only known once
+#all rows are written
+METRICS_HEADER_SIZE = 128
+
+class NpzWriter(object):
+    """Writes the long table as a numpy .npz archive, without numpy
+
+    The archive is made of .npy arrays, loaded with numpy.load(path):
+        metrics: float64 array with one row per sample and one column per
+            numeric column of the long table, nan for missing values
+        names: the File Name of each sample
+        text: the other text columns of each sample (meta data)
+        text_columns: name of each column of text
+        levels: 3 rows of labels for the columns of metrics, the first and
+            second levels of the header are repeated over their columns
+
+    The rows of metrics are written to a temporary file as they are
+    added. Used in a with statement, the archive is written when the block
+    ends and the temporary file is removed even if the block fails.
+
+    Attributes:
+        path: path of the .npz file
+        headers: header levels of the long table added so far
+        texts: text columns of each row added so far
+        nb_rows: number of rows added so far
+    """
+    def __init__(self, path):
+        self.path = path
+        self.headers = []
+        self.texts = []
+        self.nb_rows = 0
+        handle, self.metrics_path = tempfile.mkstemp(suffix='.npy')
+        self.metrics_file = os.fdopen(handle, 'wb')
+        self.metrics_file.write(' ' * METRICS_HEADER_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def add(self, row):
+        """Adds a row of the long table, the 3 levels of the header first
+
+        A row whose width differs from the header's is reported and left
+        out of the archive, its metrics would not fit the declared shape
+        """
+        if len(self.headers) < NB_HEADERS:
+            self.headers.append(row)
+            return
+        if len(row) != len(self.headers[0]):
+            print 'Could not add sample %s to %s: %d columns instead of ' \
+                  '%d' % (row[0], self.path, len(row), len(self.headers[0]))
+            return
+        texts = []
+        values = array('d')
+        for i, value in enumerate(row):
+            if i in TEXT_COLUMNS:
+                texts.append(value)
+            elif value == '-':
+                values.append(float('nan'))
+            else:
+                values.append(float(value))
+        if sys.byteorder == 'big':
+            values.byteswap()
+        values.tofile(self.metrics_file)
+        self.texts.append(texts)
+        self.nb_rows += 1
+
+    def close(self):
+        """Writes the .npz archive
+        """
+        nb_values = len(self.headers[0]) - len(TEXT_COLUMNS) \
+            if self.headers else 0
+        self.metrics_file.seek(0)
+        self.metrics_file.write(npy_header('<f8', (self.nb_rows, nb_values),
+                                           METRICS_HEADER_SIZE))
+        self.metrics_file.close()
+
+        headers = fill_levels(self.headers)
+        text_header = self.headers[1] if len(self.headers) > 1 else []
+        try:
+            with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED,
+                                 allowZip64=True) as npz:
+                npz.write(self.metrics_path, 'metrics.npy')
+                npz.writestr('names.npy',
+                             npy_strings([texts[0] for texts in self.texts],
+                                         (self.nb_rows,)))
+                npz.writestr('text.npy',
+                             npy_strings([text for texts in self.texts
+                                          for text in texts[1:]],
+                                         (self.nb_rows,
+                                          len(TEXT_COLUMNS) - 1)))
+                npz.writestr('text_columns.npy',
+                             npy_strings([text_header[i]
+                                          for i in TEXT_COLUMNS[1:]
+                                          if i < len(text_header)],
+                                         (len(TEXT_COLUMNS) - 1,)))
+                npz.writestr('levels.npy',
+                             npy_strings([label for header in headers
+                                          for i, label in enumerate(header)
+                                          if i not in TEXT_COLUMNS],
+                                         (len(headers), nb_values)))
+        except (IOError, OSError):
+            print 'Could not write ' + self.path
+        finally:
+            os.remove(self.metrics_path)
+
+    def discard(self):
+        """Removes the temporary file without writing the archive
+        """
+        self.metrics_file.close()
+        os.remove(self.metrics_path)
+
+
+def fill_levels(headers):
+    """Repeats each label of the levels of the header over the columns it
+    spans, up to the next label of its level or of a level above it
+
+    Returns:
+        the filled levels
+    """
+    filled = []
+    starts = set()
+    for header in headers:
+        level = []
+        label = ''
+        for i, value in enumerate(header):
+            if value or i in starts:
+                label = value
+            level.append(label)
+        starts.update(i for i, value in enumerate(header) if value)
+        filled.append(level)
+    return filled
+
+
+def npy_header(descr, shape, size=None):
+    """Header of a .npy file (format 1.0)
+
+    Args:
+        descr: numpy dtype of the data, ex: '<f8'
+        shape: tuple with the shape of the array
+        size: total size of the header, the smallest multiple of 64 when
+            None
+
+    Returns:
+        the header as a string
+    """
+    dims = ', '.join('%d' % dim for dim in shape)
+    if len(shape) == 1:
+        dims += ','
+    text = "{'descr': '%s', 'fortran_order': False, 'shape': (%s), }" % (
+        descr, dims)
+    if size is None:
+        size = -(-(10 + len(text) + 1) // 64) * 64
+    text = text.ljust(size - 10 - 1) + '\n'
+    return '\x93NUMPY\x01\x00' + struct.pack('<H', len(text)) + text
+
+
+def npy_strings(strings, shape):
+    """A .npy file holding unicode strings, numpy's '<U' dtype
+
+    Args:
+        strings: the strings in row major order, utf-8 if not unicode
+        shape: tuple with the shape of the array
+
+    Returns:
+        the content of the file as a string
+    """
+    strings = [value if isinstance(value, unicode) else
+               str(value).decode('utf-8', 'replace') for value in strings]
+    width = max([len(value) for value in strings] + [1])
+    data = ''.join(value.ljust(width, u'\0').encode('utf-32-le')
+                   for value in strings)
+    return npy_header('<U%d' % width, shape) + data
@@ -4,7 +4,15 @@ Created on January 25, 2014
 @author: Jonathan Laperle(jonathan.laperle@usherbrooke.ca)
 """
 
+import threading
 import zipfile
+from array import array
+from geecq.others import mapped_file
+
+CHUNK_SIZE = 1 << 16
+#held while a pending module is decoded, the objects are shared between
+#rows and the graphs are built on many threads
+DECODE_LOCK = threading.Lock()
 
 class Fastqc(object):
     """Used to extract and contain data from a fastqc_data.txt file
@@ -13,41 +21,145 @@ class Fastqc(object):
         fileName: name of the fastq file
         nbSequences: total number of sequences
         gcContent: content in gc (%)
-        posQuality: list of numbers with index = the position
+        posQuality: array of floats with index = the position
             and the value = average quality for that position
-        seqLength: List of lists of format [Length, nb sequences]
-        qual: list of numbers with index = quality score and
+        seqLength: LengthDistribution, nb sequences for each length
+        qual: array of floats with index = quality score and
               value = nb sequences
-        dup: list of numbers with index = duplication level and
+        dup: array of floats with index = duplication level and
              value = nb sequences, [0] is Total
+
+    Basic Statistics is decoded as soon as the file is read, the text of
+    the other modules is kept and only decoded the first time their
+    attribute is used, so that callers needing the name or the number of
+    sequences do not pay for the rest. Pickling keeps the pending text,
+    so the objects of the parse cache stay lazy, while the --jobs workers
+    decode every module before sending their objects back.
     """
+    #bump whenever the extracted data changes, cached objects of an
+    #older version are parsed again
+    PARSER_VERSION = 3
+
+    #no __dict__, tens of thousands of samples can be held at once
+    __slots__ = ('name', 'version', 'nb_sequences', 'gc_content',
+                 'pos_quality_', 'seq_length_', 'qual_', 'dup_', 'pending_')
+
+    #name of the loader for each module of a fastqc_data.txt file,
+    #modules missing from this dict are skipped
+    MODULES = {'Basic Statistics': 'load_basic_',
+               'Per base sequence quality': 'load_pos_quality_',
+               'Per sequence quality scores': 'load_qual_',
+               'Sequence Length Distribution': 'load_length_',
+               'Sequence Duplication Levels': 'load_dup_'}
+
+    #attribute filled by each module decoded on first use
+    LAZY_MODULES = {'Per base sequence quality': 'pos_quality',
+                    'Per sequence quality scores': 'qual',
+                    'Sequence Length Distribution': 'seq_length',
+                    'Sequence Duplication Levels': 'dup'}
+
     def __init__(self):
         self.name = ''
         self.version = 0
         self.nb_sequences = 0
         self.gc_content = 0
-        self.pos_quality = []
-        self.seq_length = []
-        self.qual = []
-        self.dup = []
+        self.pos_quality_ = array('d')
+        self.seq_length_ = LengthDistribution()
+        self.qual_ = array('d')
+        self.dup_ = array('d')
+        #(module name, text) by attribute for the modules not decoded yet
+        self.pending_ = {}
+
+    def decode_(self, attribute):
+        """Decodes the module filling attribute if it is still pending
+
+        The module stays pending until it is fully decoded, so that another
+        thread never reads a partly filled attribute
+        """
+        if attribute not in self.pending_:
+            return
+        with DECODE_LOCK:
+            if attribute in self.pending_:
+                name, text = self.pending_[attribute]
+                getattr(self, self.MODULES[name])(text.split('\n'))
+                del self.pending_[attribute]
+
+    def decode_all(self):
+        """Decodes every module still pending
+        """
+        for attribute in list(self.pending_):
+            self.decode_(attribute)
+
+    def __getstate__(self):
+        #a module is never copied both decoded and pending
+        with DECODE_LOCK:
+            state = dict((slot, getattr(self, slot))
+                         for slot in self.__slots__)
+            state['pending_'] = dict(self.pending_)
+        return state
+
+    def __setstate__(self, state):
+        for slot, value in state.iteritems():
+            setattr(self, slot, value)
+
+    @property
+    def pos_quality(self):
+        self.decode_('pos_quality')
+        return self.pos_quality_
+
+    @pos_quality.setter
+    def pos_quality(self, value):
+        self.pending_.pop('pos_quality', None)
+        self.pos_quality_ = value
+
+    @property
+    def seq_length(self):
+        self.decode_('seq_length')
+        return self.seq_length_
+
+    @seq_length.setter
+    def seq_length(self, value):
+        self.pending_.pop('seq_length', None)
+        self.seq_length_ = value
 
-    def load_version_(self, module):
+    @property
+    def qual(self):
+        self.decode_('qual')
+        return self.qual_
+
+    @qual.setter
+    def qual(self, value):
+        self.pending_.pop('qual', None)
+        self.qual_ = value
+
+    @property
+    def dup(self):
+        self.decode_('dup')
+        return self.dup_
+
+    @dup.setter
+    def dup(self, value):
+        self.pending_.pop('dup', None)
+        self.dup_ = value
+
+    def load_version_(self, line):
         """find the version number of the fastqc file, extracts the 2nd number
         note: 1.10 is very different from 1.11 and requires new code
+
+        Args:
+            line: the '##FastQC' line of a fastqc_data.txt file
         """
-        for line in module.split('\n'):
-            if line.startswith('##FastQC'):
-                self.version = int(line.split()[1].split('.')[1])
+        self.version = int(line.split()[1].split('.')[1])
 
     def load_basic_(self, module):
         """Extracts data from the basic statistics section of a
         fastqc_data.txt file
 
         Args:
-            module: the raw text of the section(delimited by '>>'
-                which should not be included in the string)
+            module: list of the lines of the section, without
+                its '>>' header and '>>END_MODULE' lines
         """
-        for line in module.split('\n'):
+        for line in module:
             if line.startswith('Filename'):
                 self.name = line.split()[-1]
             if line.startswith('Total Sequences'):
@@ -60,71 +172,126 @@ class Fastqc(object):
         of a fastqc_data.txt file
 
         Args:
-            module: the raw text of the section(delimited by '>>'
-                which should not be included in the string)
+            module: list of the lines of the section, without
+                its '>>' header and '>>END_MODULE' lines
         """
-        for line in module.split('\n'):
+        for line in module:
             if line and line[0].isdigit():
                 line = line.split()
-                self.pos_quality.append(float(line[2]))
+                self.pos_quality_.append(float(line[2]))
 
     def load_qual_(self, module):
         """Extracts data from the Per sequence quality scores section
         of a fastqc_data.txt file
 
         Args:
-            module: the raw text of the section(delimited by '>>'
-                which should not be included in the string)
+            module: list of the lines of the section, without
+                its '>>' header and '>>END_MODULE' lines
         """
-        for line in module.split('\n'):
+        for line in module:
             if line and line[0].isdigit():
                 line = line.split()
-                while int(line[0]) > len(self.qual):
-                    self.qual.append(0.0)
-                self.qual.append(float(line[1]))
+                while int(line[0]) > len(self.qual_):
+                    self.qual_.append(0.0)
+                self.qual_.append(float(line[1]))
 
     def load_length_(self, module):
         """Extracts data from the Sequence Length Distribution
         section of a fastqc_data.txt file
 
         Args:
-            module: the raw text of the section(delimited by '>>'
-                which should not be included in the string)
+            module: list of the lines of the section, without
+                its '>>' header and '>>END_MODULE' lines
         """
-        for line in module.split('\n'):
+        for line in module:
             if line and line[0].isdigit():
                 line = line.split()
                 if '-' in line[0]:
                     line2 = line[0].split('-')
                     for x in line2:
-                        self.seq_length.append([int(x), float(line[1])/2])
+                        self.seq_length_.add(int(x), float(line[1])/2)
                 else:
                     x = int(line[0])
                     y = float(line[1])
-                    self.seq_length.append([x, y])
+                    self.seq_length_.add(x, y)
 
     def load_dup_(self, module):
         """Extracts data from the Sequence Duplication Levels of a
         fastqc_data.txt file
 
         Args:
-            module: the raw text of the section(delimited by '>>'
-                which should not be included in the string)
+            module: list of the lines of the section, without
+                its '>>' header and '>>END_MODULE' lines
         """
-        for line in module.split('\n'):
+        for line in module:
             if line.startswith('#Total Duplicate Percentage') or line.startswith('#Total Deduplicated Percentage'):
                 y = float(line.split()[-1])
-                self.dup.append(y)
+                self.dup_.append(y)
             line = line.replace('>','')
             line = line.replace('+', '')
             line = line.replace('k', '000')
             if line and line[0].isdigit():
                 line = line.split()
                 if int(line[0]) > 10:
-                    self.dup[-1] = self.dup[-1] + float(line[1])
+                    self.dup_[-1] = self.dup_[-1] + float(line[1])
                 else:
                     y = float(line[1])
-                    self.dup.append(y)
+                    self.dup_.append(y)
+
+    def load_from_stream(self, stream):
+        """Extracts data from a fastqc_data.txt file without holding it
+        in memory as a whole
+
+        Each module is dispatched once on its '>>' header, modules without
+        a loader are skipped without being split into lines. Reading stops
+        once every module of MODULES is found. The modules of LAZY_MODULES
+        are kept as text and decoded on first use
+
+        Args:
+            stream: file-like object open on a fastqc_data.txt file
+                (file, zip member, ...)
+        """
+        head = stream.readline()
+        if head.startswith('##FastQC'):
+            self.load_version_(head)
+            head = ''
+        self.load_modules_(iter_modules(stream, self.MODULES, head))
+
+    def load_from_buffer(self, data):
+        """Extracts data from the content of a fastqc_data.txt file held
+        in memory
+
+        The '>>' markers are searched for in data and only the text of the
+        modules of MODULES is copied out of it
+
+        Args:
+            data: content of a fastqc_data.txt file, string or mmap
+        """
+        start = 0
+        if data[:8] == '##FastQC':
+            start = data.find('\n')
+            if start == -1:
+                self.load_version_(data)
+                return
+            self.load_version_(data[:start])
+        self.load_modules_(find_modules(data, self.MODULES, start))
+
+    def load_modules_(self, modules):
+        """Decodes or keeps for later each module, stops once every module
+        of MODULES is found
+
+        Args:
+            modules: iterable of (name, text) of the modules of the file
+        """
+        remaining = set(self.MODULES)
+        for name, text in modules:
+            if name in self.LAZY_MODULES:
+                self.pending_[self.LAZY_MODULES[name]] = (name, text)
+            else:
+                getattr(self, self.MODULES[name])(text.split('\n'))
+            remaining.discard(name)
+            if not remaining:
+                break
 
     def load_from_string(self, file_txt):
         """Extracts data from a string
@@ -132,43 +299,195 @@ class Fastqc(object):
         Args:
             fileTxt: raw text from a fastqc_data.txt file(string)
         """
-        for module in file_txt.split('>>'):
-            if module.startswith('##FastQC'):
-                self.load_version_(module)
-            if module.startswith('Basic Statistics'):
-                self.load_basic_(module)
-            if module.startswith('Per base sequence quality'):
-                self.load_pos_quality_(module)
-            if module.startswith('Per sequence quality scores'):
-                self.load_qual_(module)
-            if module.startswith('Sequence Length Distribution'):
-                self.load_length_(module)
-            if module.startswith('Sequence Duplication Levels'):
-                self.load_dup_(module)
+        self.load_from_buffer(file_txt)
 
     def load_from_file(self, file_name):
-        """Extracts data from a fastqc_data.txt file
+        """Extracts data from a fastqc_data.txt file, mapped in memory
 
         Args:
             fileName: path to a fastqc_data.txt file
         """
         try:
-            self.load_from_string(open(file_name, 'r').read())
+            with mapped_file(file_name) as data:
+                self.load_from_buffer(data)
         except IOError:
             print 'Could not open ' + file_name
 
-    def load_from_zip(self, zip_file):
+    def load_from_zip(self, zip_name):
         """Extracts data from a zip archive
 
+        The fastqc_data.txt member is found in the central directory of
+        the archive and decompressed as a stream, the report and images
+        are never read
+
         Args:
             fileName: path to a zip archive containing a fastqc_data.txt file
         """
         try:
-            zip_file = zipfile.ZipFile(zip_file)
-            for filename in zip_file.namelist():
-                if filename.endswith('fastqc_data.txt'):
-                    txt_file = zip_file.read(filename)
-                    self.load_from_string(txt_file)
-            zip_file.close()
+            with zipfile.ZipFile(zip_name) as zip_file:
+                for info in zip_file.infolist():
+                    if info.filename.endswith('fastqc_data.txt'):
+                        with zip_file.open(info) as txt_file:
+                            self.load_from_stream(txt_file)
+                        break
         except (zipfile.BadZipfile, IOError):
-            print 'Could not open ' + zip_file
+            print 'Could not open ' + zip_name
+
+
+class LengthDistribution(object):
+    """Number of sequences for each length of a Sequence Length Distribution
+    module, stored densely from the shortest length so that any length is
+    looked up in O(1)
+
+    Iterating over it yields [length, nb sequences] for each length found
+    in the module, in increasing order
+
+    Attributes:
+        min_length: shortest length, None when empty
+        counts: array of nb sequences with index = length - min_length
+        present: bytearray with 1 at the index of the lengths found in
+            the module, the other counts are 0
+    """
+    __slots__ = ('min_length', 'counts', 'present')
+
+    def __init__(self):
+        self.min_length = None
+        self.counts = array('d')
+        self.present = bytearray()
+
+    def max_length(self):
+        """Longest length, None when empty
+        """
+        if self.min_length is None:
+            return None
+        return self.min_length + len(self.counts) - 1
+
+    def add(self, length, count):
+        """Adds count sequences of the given length
+        """
+        if self.min_length is None:
+            self.min_length = length
+        elif length < self.min_length:
+            shift = self.min_length - length
+            self.counts[0:0] = array('d', [0.0]) * shift
+            self.present[0:0] = bytearray(shift)
+            self.min_length = length
+        index = length - self.min_length
+        if index >= len(self.counts):
+            grow = index + 1 - len(self.counts)
+            self.counts.extend(array('d', [0.0]) * grow)
+            self.present.extend(bytearray(grow))
+        self.counts[index] += count
+        self.present[index] = 1
+
+    def get(self, length, default=None):
+        """nb sequences of the given length, default if the length was
+        not found in the module
+        """
+        if self.min_length is None:
+            return default
+        index = length - self.min_length
+        if 0 <= index < len(self.counts) and self.present[index]:
+            return self.counts[index]
+        return default
+
+    def __len__(self):
+        return sum(self.present)
+
+    def __iter__(self):
+        for index, count in enumerate(self.counts):
+            if self.present[index]:
+                yield [self.min_length + index, count]
+
+
+def find_modules(data, names, start=0):
+    """Finds the modules of a fastqc_data.txt file held in memory
+
+    Args:
+        data: content of a fastqc_data.txt file, string or mmap
+        names: names of the modules to yield
+        start: position in data where to start searching, the end of the
+            '##FastQC' line if any
+
+    Yields:
+        (name, text) for each module of names found in the file, text
+        does not contain the '>>' header and '>>END_MODULE' lines
+    """
+    #found is the position of the newline before a '>>' marker
+    if data[:2] == '>>':
+        found = -1
+    else:
+        found = data.find('\n>>', start)
+        if found == -1:
+            return
+    while True:
+        eol = data.find('\n', found + 1)
+        if eol == -1:
+            eol = len(data)
+        name = data[found + 3:eol].split('\t')[0].strip()
+        if name in names:
+            end = data.find('\n>>END_MODULE', eol)
+            if end == -1:
+                yield name, data[eol + 1:]
+                return
+            yield name, data[eol + 1:end]
+            eol = end + 1
+        found = data.find('\n>>', eol)
+        if found == -1:
+            return
+
+
+def iter_modules(stream, names, head=''):
+    """Reads a fastqc_data.txt file by chunks and yields its modules
+
+    The '>>' markers are searched for in the raw chunks, the text of
+    unwanted modules is dropped as soon as it has been searched
+
+    Args:
+        stream: file-like object open on a fastqc_data.txt file
+        names: names of the modules to yield
+        head: text already read from the stream
+
+    Yields:
+        (name, text) for each module of names found in the file, text
+        does not contain the '>>' header and '>>END_MODULE' lines
+    """
+    buf = '\n' + head
+    pos = 0
+    wanted = None
+    eof = False
+    while True:
+        if wanted is None:
+            found = buf.find('\n>>', pos)
+        else:
+            found = buf.find('\n>>END_MODULE', pos)
+        eol = buf.find('\n', found + 1) if found != -1 else -1
+        if eol == -1 and not eof:
+            #keep only what a marker or the wanted module can start in
+            if wanted is not None:
+                cut = pos
+            elif found != -1:
+                cut = found
+            else:
+                cut = buf.rfind('\n', pos)
+                if cut == -1:
+                    cut = len(buf)
+            chunk = stream.read(CHUNK_SIZE)
+            eof = not chunk
+            buf = buf[cut:] + chunk
+            pos = 0
+            continue
+        if found == -1:
+            if wanted is not None:
+                yield wanted, buf[pos + 1:]
+            return
+        if eol == -1:
+            eol = len(buf)
+        if wanted is None:
+            name = buf[found + 3:eol].split('\t')[0].strip()
+            if name in names:
+                wanted = name
+        else:
+            yield wanted, buf[pos + 1:found]
+            wanted = None
+        pos = eol
@@ -3,32 +3,29 @@ Created on January 25, 2014
 
 @author: Jonathan Laperle(jonathan.laperle@usherbrooke.ca)
 """
-import geecq.others as others
-from itertools import product
-import string
-import subprocess
-import os
-import os.path
+from geecq.render import BoxPlot, make_renderer
+from multiprocessing.pool import ThreadPool
 
 class GraphMaker(object):
-    """Used to write R scripts in order to generate graphs
+    """Used to make the graphs of a list of fastqc objects
 
-    the graphs are in .png format
+    the data of each graph is handed to a renderer which draws it,
+    see geecq.render
 
     Attributes:
-        labels: list of 2 letter strings in alphabetical order,
-            used as labels in R data-frames
         fastqcList: list of all fastqc objects to be included in the graphs
         path: output path
+        renderer: object drawing the graphs, defaults to make_renderer()
     """
-    def __init__(self, fastqc_list, path):
-        self.labels = [''.join(word) for word in
-                       product(string.ascii_lowercase, string.ascii_lowercase)]
+    def __init__(self, fastqc_list, path, renderer=None):
         self.fastqc_list = []
         for fastqc in fastqc_list:
             if fastqc.name:
                 self.fastqc_list.append(fastqc)
         self.path = path
+        if renderer is None:
+            renderer = make_renderer()
+        self.renderer = renderer
 
     def max_qual(self):
         """Maxmimal quality value for all fastqc objects in fastqcList
@@ -45,7 +42,7 @@ class GraphMaker(object):
         Returns:
             Minimal length for all fastqc objects in fastqcList
         """
-        return min([qc.seq_length[0][0] for qc in self.fastqc_list])
+        return min([qc.seq_length.min_length for qc in self.fastqc_list])
 
     def max_length(self):
         """Maximal length for all fastqc objects in fastqcList
@@ -53,118 +50,118 @@ class GraphMaker(object):
         Returns:
             Maximal length for all fastqc objects in fastqcList
         """
-        return max([qc.seq_length[-1][0] for qc in self.fastqc_list])
+        return max([qc.seq_length.max_length() for qc in self.fastqc_list])
 
-    def generate_graph(self, file_name, rscript):
-        """Generates the graph with an rscript
-
-        Args:
-            fileName: name of the file to create(no extention)
-            rscript: text of the rscript used to generate a graph
-        """
-        others.write_file(self.path + file_name + '.R', rscript)
-        subprocess.call(['Rscript', self.path + file_name + '.R'])
-        os.remove(self.path + file_name + '.R')
-
-    def make_per_base_qual_graph(self):
-        """Generates the per base quality graph
+    def per_base_qual_plot(self):
+        """Data of the per base quality graph
         """
-        script = 'data<-data.frame(\n\t'
-        for x_value in range(10):
-            script += "'%s' = c(" % (self.labels[x_value])
-            for y_value in [fastqc.pos_quality for fastqc in self.fastqc_list]:
-                script += '%g, ' % (y_value[x_value])
-            script = script[:-2] + '),\n\t'
-        for x_value in range(10):
-            script += "'%s' = c(" % (self.labels[x_value+10])
-            for y_value in [fastqc.pos_quality for fastqc in self.fastqc_list]:
-                script += '%g, ' % (y_value[x_value-10])
-            script = script[:-2] + '),\n\t'
-        script = script[:-3] + '\n)\n'
-        script += 'data<-data[,order(names(data))]\n'
-        script += "png('" + self.path + "per_base_quality.png')\n"
-        script += "boxplot(data, ylab='Quality score', xlab='Position', " + \
-                  "names=c('1','2','3','4','5','6','7','8','9','10'," + \
-                  "'-10','-9','-8','-7','-6','-5','-4','-3','-2','-1'))\n"
-        script += "dev.off()"
-        self.generate_graph('per_base_quality', script)
-
-    def make_per_sequence_qual_graph(self):
-        """Generates the Per sequence quality scores graph
+        columns = [[fastqc.pos_quality[x_value]
+                    for fastqc in self.fastqc_list]
+                   for x_value in range(10) + range(-10, 0)]
+        return BoxPlot(self.path + 'per_base_quality', columns,
+                       [str(i) for i in range(1, 11) + range(-10, 0)],
+                       'Position', 'Quality score')
+
+    def per_sequence_qual_plot(self):
+        """Data of the Per sequence quality scores graph
         """
-        script = 'data<-data.frame('
+        columns = []
         for i in range(self.max_qual()+1):
-            script += "'%s' = c(" % (self.labels[i])
+            column = []
             for fastqc in self.fastqc_list:
                 if len(fastqc.qual) > i:
-                    script += '%g, ' % (fastqc.qual[i] / fastqc.nb_sequences)
+                    column.append(fastqc.qual[i] / fastqc.nb_sequences)
                 else:
-                    script += '0, '
-            script = script[:-2] + '),\n\t'
-        script = script[:-3] + '\n)\n'
-
-        script += 'data<-data[,order(names(data))]\n'
-        script += "png('"+ self.path +"per_sequence_quality.png')\n"
-        script += "boxplot(data, ylab='nb sequences / total sequences', " + \
-                  "xlab='Quality score', names=c("
-        for i in range(self.max_qual()+1):
-            script += "'%s', " % (i)
-        script = script[:-2] + "))\n"
-        script += "dev.off()"
-        self.generate_graph('per_sequence_quality', script)
-
-    def make_seq_len_graph(self):
-        """Generates the Sequence Length Distribution graph
+                    column.append(0.0)
+            columns.append(column)
+        return BoxPlot(self.path + 'per_sequence_quality', columns,
+                       [str(i) for i in range(self.max_qual()+1)],
+                       'Quality score', 'nb sequences / total sequences')
+
+    def seq_len_plot(self):
+        """Data of the Sequence Length Distribution graph
         """
-        script = 'data<-data.frame('
-        for i in range(self.min_length(), self.max_length()+1):
-            script += "'%s' = c(" % (self.labels[i])
-            for fastqc in self.fastqc_list:
-                if i in [row[0] for row in fastqc.seq_length]:
-                    temp = fastqc.seq_length[i-fastqc.seq_length[0][0]][1]
-                    script += '%g, ' % (temp / fastqc.nb_sequences)
-                else:
-                    script += '0, '
-            script = script[:-2] + '),\n\t'
-        script = script[:-3] + '\n)\n'
-
-        script += 'data<-data[,order(names(data))]\n'
-        script += "png('"+self.path+"sequence_length.png')\n" + \
-                  "boxplot(data, ylab='nb sequences / total sequences', " + \
-                  "xlab='Length(nucl)', names=c("
-        for i in range(self.min_length(), self.max_length()+1):
-            script += "'%s', " % (i)
-        script = script[:-2] + "))\n"
-        script += "dev.off()"
-        self.generate_graph('sequence_length', script)
-
-    def make_duplication_graph(self):
-        """Generates the Sequence Duplication Levels graph
+        lengths = range(self.min_length(), self.max_length()+1)
+        columns = [[fastqc.seq_length.get(i, 0.0) / fastqc.nb_sequences
+                    for fastqc in self.fastqc_list]
+                   for i in lengths]
+        return BoxPlot(self.path + 'sequence_length', columns,
+                       [str(i) for i in lengths],
+                       'Length(nucl)', 'nb sequences / total sequences')
+
+    def duplication_plot(self):
+        """Data of the Sequence Duplication Levels graph
         """
         #fastq_version = self.fastqc_list[0].version
         #if fastq_version >= 11:
-        #    xlabels = "c('0','1','2','3','4','5','6','7','8','9','>10','>50','>100','>500', '>1k', '>5k', '>10k+')"
+        #    xlabels = ['0','1','2','3','4','5','6','7','8','9','>10','>50','>100','>500', '>1k', '>5k', '>10k+']
         #else:
-        xlabels = "c('0','1','2','3','4','5','6','7','8','9','10+')"
-        script = 'data<-data.frame('
-        for x_value in range(11):
-            script += "'%s' = c(" % (self.labels[x_value])
-            for y_value in [fastqc.dup for fastqc in self.fastqc_list]:
-                script += '%g, ' % (y_value[x_value])
-            script = script[:-2] + '),\n\t'
-        script = script[:-3] + '\n)\n'
-        script += 'data<-data[,order(names(data))]\n'
-        script += "png('"+self.path+"sequence_duplication.png')\n"
-        script += "boxplot(data, ylab='nb sequences(%)', " + \
-                  "xlab='Sequence duplication level', " + \
-                  "names=" + xlabels + ")\n"
-        script += "dev.off()"
-        self.generate_graph('sequence_duplication', script)
+        xlabels = [str(i) for i in range(10)] + ['10+']
+        columns = [[fastqc.dup[x_value] for fastqc in self.fastqc_list]
+                   for x_value in range(11)]
+        return BoxPlot(self.path + 'sequence_duplication', columns, xlabels,
+                       'Sequence duplication level', 'nb sequences(%)')
+
+    def plot_builders(self):
+        """Methods building the data of each graph
+        """
+        return [self.per_base_qual_plot,
+                self.per_sequence_qual_plot,
+                self.seq_len_plot,
+                self.duplication_plot]
+
+    def plots(self):
+        """Data of all graphs
+        """
+        return [builder() for builder in self.plot_builders()]
 
     def generate_all(self):
         """Generates all graphs in path specified by self.path
+
+        Returns:
+            dict with (status, seconds) for the path of each graph, see
+            the draw() method of the renderers
         """
-        self.make_per_base_qual_graph()
-        self.make_per_sequence_qual_graph()
-        self.make_seq_len_graph()
-        self.make_duplication_graph()
+        return self.renderer.draw(self.plots())
+
+
+def render_graphs(graph_makers, renderer, workers=1):
+    """Draws the graphs of many GraphMaker objects on a pool of threads
+
+    The threads share the fastqc objects of the graph makers, nothing is
+    copied. Plots are drawn one per task, except for renderers in batch
+    mode (R) which get one group of plots per worker so that each worker
+    starts a single Rscript
+
+    Args:
+        graph_makers: list of GraphMaker objects
+        renderer: object drawing the graphs, see geecq.render
+        workers: number of threads
+
+    Returns:
+        list of (path, status, seconds) in the order of the plots, the
+        status being 'ok' or an error message
+    """
+    builders = [builder for graph_maker in graph_makers
+                for builder in graph_maker.plot_builders()]
+    if workers > 1 and len(builders) > 1:
+        pool = ThreadPool(min(workers, len(builders)))
+        mapper = pool.map
+    else:
+        pool = None
+        mapper = map
+    try:
+        plots = mapper(lambda builder: builder(), builders)
+        if renderer.batch:
+            nb_groups = max(1, min(workers, len(plots)))
+            groups = [plots[i::nb_groups] for i in range(nb_groups)]
+        else:
+            groups = [[plot] for plot in plots]
+        statuses = {}
+        for group_statuses in mapper(renderer.draw, groups):
+            statuses.update(group_statuses)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return [(plot.path,) + statuses[plot.path] for plot in plots]
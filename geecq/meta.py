@@ -4,7 +4,9 @@ Created on January 25, 2014
 @author: Jonathan Laperle(jonathan.laperle@usherbrooke.ca)
 """
 
+import os
 import re
+from cStringIO import StringIO
 
 class MetaOld(object):
     """Used to extract and contain data from a GEO meta data file
@@ -58,6 +60,12 @@ class Meta(object):
         name:
             name of the fastq file
     """
+    #bump whenever the extracted data changes, cached objects of an
+    #older version are parsed again
+    PARSER_VERSION = 2
+
+    __slots__ = ('meta', 'name')
+
     def __init__(self, name):
         self.meta = {}
         self.name = name
@@ -68,17 +76,22 @@ class Meta(object):
         Args:
             fileTxt: raw text from a meta data file(string)
         """
-        for line in file_txt.split('\n'):
-            prog = re.compile("!Sample_(.*?) = (.*)")
+        self.load_from_stream(StringIO(file_txt))
+
+    def load_from_stream(self, stream):
+        """Extracts data from a meta data file, line by line
+
+        Args:
+            stream: file-like object iterating over the lines of a meta
+                data file
+        """
+        fields = {}
+        for line in stream:
             if line.startswith("!Sample_"):
-                info = prog.match(line)
-                if info.groups()[0] in self.meta:
-                    self.meta[info.groups()[0]] += info.groups()[1]
-                else:
-                    self.meta[info.groups()[0]] = info.groups()[1]
+                add_field(fields, line)
             elif line.startswith("^SAMPLE"):
-                matched_name = re.match(r"\^SAMPLE = (.*)", line)
-                self.name = matched_name.groups()[0]
+                self.name = SAMPLE_NAME.match(line).group(1)
+        self.meta.update(join_fields(fields))
 
     def load_from_file(self, file_name):
         """Extracts data from a meta data file
@@ -87,6 +100,105 @@ class Meta(object):
             fileName: path to a meta data file
         """
         try:
-            self.load_from_string(open(file_name, 'r').read())
+            with open(file_name, 'r') as meta_file:
+                self.load_from_stream(meta_file)
         except IOError:
             print 'Could not open ' + file_name
+
+class MetaSeries(object):
+    """Used to extract the samples of a GEO series SOFT file, so that many
+    lines of the input file can share a single parsed file
+
+    Attributes:
+        samples: dictionnary where the key is the GSM id of a sample and
+            the value is its Meta object
+    """
+    #bump whenever the extracted data changes, cached objects of an
+    #older version are parsed again
+    PARSER_VERSION = 2
+
+    __slots__ = ('samples',)
+
+    def __init__(self):
+        self.samples = {}
+
+    def load_from_string(self, file_txt):
+        """Extracts the samples of a series file's content
+
+        Args:
+            fileTxt: raw text from a SOFT series file(string)
+        """
+        self.load_from_stream(StringIO(file_txt))
+
+    def load_from_stream(self, stream):
+        """Extracts the samples of a series file in a single pass, each
+        ^SAMPLE block gives one Meta object
+
+        Args:
+            stream: file-like object iterating over the lines of a SOFT
+                series file
+        """
+        meta = None
+        fields = {}
+        for line in stream:
+            if line.startswith("!Sample_"):
+                if meta is not None:
+                    add_field(fields, line)
+            elif line.startswith("^"):
+                if meta is not None:
+                    meta.meta = join_fields(fields)
+                    self.samples[meta.name] = meta
+                    meta = None
+                if line.startswith("^SAMPLE"):
+                    meta = Meta(SAMPLE_NAME.match(line).group(1))
+                    fields = {}
+        if meta is not None:
+            meta.meta = join_fields(fields)
+            self.samples[meta.name] = meta
+
+    def load_from_file(self, file_name):
+        """Extracts the samples of a series file
+
+        Args:
+            fileName: path to a SOFT series file
+        """
+        try:
+            with open(file_name, 'r') as series_file:
+                self.load_from_stream(series_file)
+        except IOError:
+            print 'Could not open ' + file_name
+
+
+#ex: !Sample_title = H3K4me3 ChIP-seq
+SAMPLE_FIELD = re.compile("!Sample_(.*?) = (.*)")
+SAMPLE_NAME = re.compile(r"\^SAMPLE = (.*)")
+
+def add_field(fields, line):
+    """Adds the value of a '!Sample_' line to fields, a dict of the list
+    of values found for each row name
+    """
+    info = SAMPLE_FIELD.match(line)
+    if info:
+        fields.setdefault(info.group(1), []).append(info.group(2))
+
+def join_fields(fields):
+    """Joins the values of the rows found on many lines
+
+    Returns:
+        dict with the value of each row
+    """
+    return dict((name, ''.join(values)) for name, values in fields.iteritems())
+
+def split_series_path(path):
+    """Splits a path of the meta column of the input file
+
+    Args:
+        path: path to a meta data file, or 'series.soft#GSM1234' for a
+            sample of a series file
+
+    Returns:
+        (path, gsm) where gsm is None for a meta data file
+    """
+    if '#' in path and not os.path.exists(path):
+        return tuple(path.rsplit('#', 1))
+    return path, None
@@ -3,6 +3,9 @@ Created on May 13, 2014
 
 @author: Jonathan Laperle(jonathan.laperle@usherbrooke.ca)
 """
+import contextlib
+import mmap
+
 def mean(container):
     """Averages all elements in container
 
@@ -42,3 +45,28 @@ def append_file(file_name, content):
     f = open(file_name, 'a')
     f.write(content)
     f.close()
+
+@contextlib.contextmanager
+def mapped_file(file_name):
+    """Maps a file in memory for reading, the file and the map are closed
+    when the block exits
+
+    Files that cannot be mapped (empty files, pipes) are read instead
+
+    Args:
+        file_name: path to the file
+
+    Yields:
+        the content of the file as an mmap object or a string, both
+        supporting find(), slicing and re
+    """
+    with open(file_name, 'rb') as in_file:
+        try:
+            data = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            data = None
+        if data is None:
+            yield in_file.read()
+        else:
+            with contextlib.closing(data):
+                yield data
@@ -0,0 +1,178 @@
+"""
+Created on October 18, 2026
+"""
+import contextlib
+import cProfile
+import json
+import os
+import resource
+import time
+
+#number of files listed as the slowest ones
+NB_SLOWEST = 10
+#Linux only, writing 5 resets the peak resident memory of the process
+CLEAR_REFS = '/proc/self/clear_refs'
+STATUS = '/proc/self/status'
+
+class Profiler(object):
+    """Records the wall time, CPU time and peak memory of the stages of a
+    run and the time spent loading each input file
+
+    Attributes:
+        dump_path: directory receiving a cProfile dump of each stage, or
+            None
+        stages: dict for each stage, in the order they ended
+        files: dict for each loaded file
+        saved_loads: number of loads avoided by sharing the files repeated
+            between rows
+    """
+    def __init__(self, dump_path=None):
+        self.dump_path = dump_path
+        self.stages = []
+        self.files = []
+        self.saved_loads = 0
+        if dump_path is not None and not os.path.exists(dump_path):
+            os.makedirs(dump_path)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Context manager recording the stage run in its block
+
+        The CPU time and peak memory of child processes (pool workers,
+        Rscript) are recorded separately. On Linux the peak memory of the
+        process is reset when the stage starts, so peak_rss_kb is the peak
+        of the stage and rss_growth_kb the memory it kept. Elsewhere
+        peak_rss_kb is the peak since the start of the process and
+        rss_growth_kb is None, peak_rss_scope tells which. Stages are not
+        nested.
+        """
+        profile = None
+        if self.dump_path is not None:
+            profile = cProfile.Profile()
+        start_status = memory_status()
+        #VmHWM is the peak which is reset, ru_maxrss also keeps the peak
+        #of the threads which ended
+        reset = 'VmHWM' in start_status and reset_peak_rss()
+        start_times = os.times()
+        start = time.time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(os.path.join(
+                    self.dump_path, name.replace(' ', '_') + '.prof'))
+            wall = time.time() - start
+            times = os.times()
+            status = memory_status()
+            growth = None
+            if 'VmRSS' in start_status and 'VmRSS' in status:
+                growth = status['VmRSS'] - start_status['VmRSS']
+            self.stages.append({
+                'stage': name,
+                'wall': wall,
+                'cpu': times[0] + times[1] - start_times[0] - start_times[1],
+                'children_cpu': times[2] + times[3] -
+                                start_times[2] - start_times[3],
+                'peak_rss_kb': status['VmHWM'] if reset else
+                               resource.getrusage(
+                                   resource.RUSAGE_SELF).ru_maxrss,
+                'peak_rss_scope': 'stage' if reset else 'process',
+                'rss_growth_kb': growth,
+                'children_peak_rss_kb': resource.getrusage(
+                    resource.RUSAGE_CHILDREN).ru_maxrss})
+
+    def record_file(self, path, loader, wall, cpu):
+        """Records the time spent loading one file
+        """
+        self.files.append({'path': path, 'loader': loader, 'wall': wall,
+                           'cpu': cpu})
+
+    def slowest_files(self, number=NB_SLOWEST):
+        """Returns:
+            the number files which took the longest to load
+        """
+        return sorted(self.files, key=lambda entry: -entry['wall'])[:number]
+
+    def report(self):
+        """Returns:
+            the report of the run as a dict
+        """
+        return {'stages': self.stages,
+                'total_wall': sum(entry['wall'] for entry in self.stages),
+                'files': self.files,
+                'saved_loads': self.saved_loads,
+                'slowest_files': self.slowest_files()}
+
+    def write(self, path):
+        """Writes the report as JSON and prints a summary
+        """
+        with open(path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+        for entry in self.stages:
+            print 'Stage %-12s %8.3f s wall %8.3f s cpu %8d KB peak' % (
+                entry['stage'], entry['wall'], entry['cpu'],
+                entry['peak_rss_kb'])
+        print '%d loads saved by sharing repeated files between rows' % \
+            self.saved_loads
+        for entry in self.slowest_files():
+            print 'Slow file %8.3f s %s' % (entry['wall'], entry['path'])
+
+
+@contextlib.contextmanager
+def no_stage():
+    """Context manager doing nothing, used when there is no profiler
+    """
+    yield
+
+
+def stage(profiler, name):
+    """Returns:
+        a context manager recording the stage name in profiler, or doing
+        nothing if profiler is None
+    """
+    if profiler is None:
+        return no_stage()
+    return profiler.stage(name)
+
+
+def reset_peak_rss():
+    """Resets the peak resident memory of the process
+
+    Returns:
+        True if it was reset, False where /proc/self/clear_refs is missing
+        or not writable
+    """
+    try:
+        with open(CLEAR_REFS, 'w') as clear_refs:
+            clear_refs.write('5')
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def memory_status():
+    """Returns:
+        dict of the memory fields of /proc/self/status in KB, such as
+        VmRSS and VmHWM, empty where the file is missing
+    """
+    status = {}
+    try:
+        with open(STATUS, 'r') as status_file:
+            for line in status_file:
+                if line.startswith('Vm') and line.endswith('kB\n'):
+                    name, value = line.split(':', 1)
+                    status[name] = int(value.split()[0])
+    except (IOError, OSError):
+        pass
+    return status
+
+
+def cpu_time():
+    """Returns:
+        the CPU time used by the current process (s), os.times() only
+        counts clock ticks
+    """
+    return time.clock()
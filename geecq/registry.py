@@ -0,0 +1,137 @@
+"""
+Created on October 18, 2026
+"""
+from geecq.profiling import cpu_time
+import functools
+import multiprocessing
+import os
+import time
+
+class LoadRegistry(object):
+    """Objects loaded during a run, each file is loaded once whatever the
+    number of rows pointing to it
+
+    Files are identified by their resolved path, so the same file reached
+    through a relative path or a symbolic link is shared as well. The
+    objects are shared between rows and must not be modified.
+
+    Attributes:
+        entries: dict of (class, loader, path, args) by key for the files
+            not loaded yet, args being given to the class to create the
+            empty object
+        objects: dict of the loaded objects by key
+        timings: dict of (wall time, CPU time) spent loading each object
+            by key, in the process which loaded it
+        nb_requests: number of times a file was asked for
+    """
+    def __init__(self):
+        self.entries = {}
+        self.objects = {}
+        self.timings = {}
+        self.nb_requests = 0
+
+    def key_(self, cls, file_name, loader):
+        """Key of file_name loaded into a cls object by loader
+        """
+        return cls.__name__, loader, os.path.realpath(file_name)
+
+    def add(self, cls, file_name, loader, *args):
+        """Asks for file_name to be loaded into a cls object
+
+        Args:
+            cls: Fastqc, Sam, Meta or MetaSeries
+            file_name: path to the file
+            loader: name of the method used to load the file
+                ex: 'load_from_zip'
+            args: arguments of cls, used by the first request of a file
+        """
+        self.nb_requests += 1
+        key = self.key_(cls, file_name, loader)
+        if key not in self.objects and key not in self.entries:
+            self.entries[key] = (cls, loader, file_name, args)
+
+    def get(self, cls, file_name, loader):
+        """Returns:
+            the object loaded from file_name, see add()
+        """
+        return self.objects[self.key_(cls, file_name, loader)]
+
+    def saved(self):
+        """Returns:
+            the number of loads avoided by sharing the objects
+        """
+        return self.nb_requests - len(self.objects) - len(self.entries)
+
+    def load(self, jobs=1, cache=None):
+        """Loads the files added since the last call
+
+        Args:
+            jobs: number of processes used to load the files
+            cache: ParseCache used to load the files, or None
+        """
+        keys = sorted(self.entries)
+        entries = [self.entries[key] for key in keys]
+        if jobs > 1 and len(entries) > 1:
+            pool = multiprocessing.Pool(jobs)
+            chunksize = max(1, len(entries) // (jobs * 4))
+            results = pool.imap(functools.partial(load_entry_worker_,
+                                                  cache=cache, decode=True),
+                                entries, chunksize)
+        else:
+            pool = None
+            results = (load_entry_worker_(entry, cache) for entry in entries)
+
+        try:
+            for key, result in zip(keys, results):
+                if isinstance(result, SystemExit):
+                    raise result
+                self.objects[key], wall, cpu = result
+                self.timings[key] = (wall, cpu)
+                del self.entries[key]
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+
+def load_entry(entry, cache=None):
+    """Loads a file added to a LoadRegistry
+
+    Args:
+        entry: (class, loader, path, args), see LoadRegistry.add
+        cache: ParseCache used to load the file, or None
+
+    Returns:
+        the loaded object
+    """
+    cls, loader, file_name, args = entry
+    obj = cls(*args)
+    if cache is None:
+        getattr(obj, loader)(file_name)
+        return obj
+    return cache.load(obj, file_name, loader)
+
+
+def load_entry_worker_(entry, cache=None, decode=False):
+    """Entry point of the pool workers for load_entry
+
+    A SystemExit raised in a worker would leave the pool waiting forever,
+    so it is sent back to the main process instead
+
+    Args:
+        entry: (class, loader, path, args), see LoadRegistry.add
+        cache: ParseCache used to load the file, or None
+        decode: True to decode the modules of a lazy object, so that the
+            workers decode them in parallel rather than the main process
+
+    Returns:
+        (object, wall time, CPU time) or the SystemExit
+    """
+    start = time.time()
+    start_cpu = cpu_time()
+    try:
+        obj = load_entry(entry, cache)
+    except SystemExit as error:
+        return error
+    if decode and hasattr(obj, 'decode_all'):
+        obj.decode_all()
+    return obj, time.time() - start, cpu_time() - start_cpu
@@ -0,0 +1,217 @@
+"""
+Created on October 18, 2026
+"""
+import geecq.others as others
+from array import array
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import os
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+except ImportError:
+    matplotlib = None
+
+class BoxPlot(object):
+    """Data of a graph made of one boxplot per x value, given to a renderer
+
+    Attributes:
+        path: path of the graph to create(no extention)
+        columns: list with, for each x value, the list of y values of
+            all fastqc objects
+        names: label of each x value
+        xlab: label of the x axis
+        ylab: label of the y axis
+    """
+    def __init__(self, path, columns, names, xlab, ylab):
+        self.path = path
+        self.columns = columns
+        self.names = names
+        self.xlab = xlab
+        self.ylab = ylab
+
+
+class PythonRenderer(object):
+    """Draws the graphs in process with matplotlib
+
+    the graphs are in .png format, 480x480 pixels like R's png(). Each
+    plot gets its own figure, so plots may be drawn from many threads
+
+    Attributes:
+        batch: False, plots are drawn one at a time
+    """
+    name = 'python'
+    batch = False
+
+    def __init__(self):
+        if matplotlib is None:
+            raise ImportError('matplotlib is required by the python renderer')
+
+    def draw(self, plots):
+        """Draws each plot into plot.path + '.png'
+
+        Returns:
+            dict with (status, seconds) for the path of each plot, the
+            status being 'ok' or an error message
+        """
+        statuses = {}
+        for plot in plots:
+            start = time.time()
+            try:
+                figure = Figure(figsize=(4.8, 4.8), dpi=100)
+                FigureCanvasAgg(figure)
+                axes = figure.add_subplot(111)
+                #R only draws the labels which do not overlap, keep about 20
+                step = (len(plot.names) - 1) // 20 + 1
+                axes.boxplot(plot.columns,
+                             labels=[name if i % step == 0 else ''
+                                     for i, name in enumerate(plot.names)])
+                axes.set_xlabel(plot.xlab)
+                axes.set_ylabel(plot.ylab)
+                figure.savefig(plot.path + '.png')
+                status = 'ok'
+            except Exception as error:
+                status = str(error) or type(error).__name__
+            statuses[plot.path] = (status, time.time() - start)
+        return statuses
+
+
+class RRenderer(object):
+    """Draws the graphs by running R scripts with Rscript
+
+    the graphs are in .png format. The data of each plot is written to a
+    temporary binary file which the script reads, so the size of the
+    script does not depend on the number of fastqc objects. draw() may be
+    called from many threads
+
+    Attributes:
+        batch: True to give many plots to each Rscript call, see
+            graph.render_graphs
+    """
+    name = 'R'
+
+    def __init__(self, batch=True):
+        self.batch = batch
+
+    def draw(self, plots):
+        """Draws plots with a single Rscript call
+
+        Returns:
+            dict with (status, seconds) for the path of each plot, the
+            status being 'ok' or an error message
+        """
+        return run_rscript(plots)
+
+
+RENDERERS = {'python': PythonRenderer, 'R': RRenderer}
+
+def make_renderer(name=None):
+    """Creates a renderer
+
+    Args:
+        name: 'python' or 'R', defaults to python when matplotlib is
+            installed and R otherwise
+
+    Returns:
+        the renderer
+    """
+    if name is None:
+        name = 'python' if matplotlib is not None else 'R'
+    return RENDERERS[name]()
+
+
+def r_quote(text):
+    """Quotes text as an R string
+    """
+    return "'%s'" % text.replace('\\', '\\\\').replace("'", "\\'")
+
+
+def run_rscript(plots):
+    """Draws plots with a single Rscript call
+
+    Returns:
+        dict with (status, seconds) for the path of each plot, seconds
+        being None when R did not report it
+    """
+    temp_dir = tempfile.mkdtemp(prefix='geecq')
+    try:
+        script = []
+        for i, plot in enumerate(plots):
+            data_path = os.path.join(temp_dir, '%d.bin' % i)
+            write_plot_data(plot, data_path)
+            script.append(r_script(plot, i, data_path))
+        script_path = os.path.join(temp_dir, 'graphs.R')
+        others.write_file(script_path, '\n'.join(script) + '\n')
+        try:
+            process = subprocess.Popen(['Rscript', script_path],
+                                       stdout=subprocess.PIPE)
+            output = process.communicate()[0]
+        except OSError as error:
+            output = ''
+            message = 'Could not run Rscript: %s' % error
+        else:
+            message = 'Rscript stopped before drawing the graph'
+    finally:
+        shutil.rmtree(temp_dir)
+    results = {}
+    for line in output.split('\n'):
+        line = line.split('\t', 3)
+        if len(line) == 4 and line[0] == 'geecq':
+            results[int(line[1])] = (line[3], float(line[2]))
+    statuses = {}
+    for i, plot in enumerate(plots):
+        statuses[plot.path] = results.get(i, (message, None))
+    return statuses
+
+
+def write_plot_data(plot, path):
+    """Writes the data of plot as little-endian doubles, one column after
+    the other, which is the layout of an R matrix with one column per x
+    value and one row per fastqc object
+
+    The columns are written one at a time, nothing is built for the
+    whole matrix
+    """
+    with open(path, 'wb') as data_file:
+        for column in plot.columns:
+            values = array('d', column)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            values.tofile(data_file)
+
+
+def r_script(plot, index, data_path):
+    """Writes the part of an R script drawing plot from the file written
+    by write_plot_data
+
+    Errors are caught so that the other plots are still drawn, a line
+    'geecq<tab>index<tab>seconds<tab>status' is printed for each plot
+
+    Returns:
+        text of the R script
+    """
+    nb_rows = len(plot.columns[0]) if plot.columns else 0
+    return "start <- proc.time()[['elapsed']]\n" + \
+           'status <- tryCatch({\n' + \
+           "\tdata<-matrix(readBin(%s, 'double', n=%d, size=8, " \
+           "endian='little'), nrow=%d)\n" % (
+               r_quote(data_path), nb_rows * len(plot.columns), nb_rows) + \
+           '\tpng(%s)\n' % r_quote(plot.path + '.png') + \
+           '\tboxplot(data, ylab=%s, xlab=%s, names=c(%s))\n' % (
+               r_quote(plot.ylab), r_quote(plot.xlab),
+               ', '.join(r_quote(name) for name in plot.names)) + \
+           '\tdev.off()\n' + \
+           "\t'ok'\n" + \
+           '}, error=function(e) {\n' + \
+           '\tgraphics.off()\n' + \
+           "\tgsub('[\\t\\n]', ' ', conditionMessage(e))\n" + \
+           '})\n' + \
+           "cat('geecq', %d, proc.time()[['elapsed']] - start, status, " \
+           "sep='\\t')\n" % index + \
+           "cat('\\n')"
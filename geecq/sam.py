@@ -5,15 +5,23 @@ Created on January 25, 2014
 """
 
 import re
+from geecq.others import mapped_file
 
 class Sam(object):
     """Used to extract and contain data from a .sam.html file
 
     Attributes:
-        MAPQ: list of lists with each element of the form [%, nb sequences]
+        MAPQ: list of lists with each element of the form
+            [% (float), nb sequences (int)]
             follows the following order >=30, >=20, >=10, >=3, < 3, Unmapped
         name: name of the fastq file
     """
+    #bump whenever the extracted data changes, cached objects of an
+    #older version are parsed again
+    PARSER_VERSION = 3
+
+    __slots__ = ('mapq', 'name')
+
     def __init__(self):
         self.mapq = []
         self.name = ''
@@ -24,8 +32,7 @@ class Sam(object):
         Args:
             rawName: unconverted name(string)
         """
-        self.name = raw_name.replace('_1', '')
-        self.name = raw_name.replace('_2', '.1')
+        self.name = convert_name(raw_name)
 
     def load_from_string(self, file_txt):
         """Extracts data from a .sam.html file
@@ -33,43 +40,141 @@ class Sam(object):
         Args:
             fileTxt: raw text from a .sam.html file(string)
         """
-        version = 2
-        lines = file_txt.split('\n')
-        for line in file_txt.split('\n'):
-            if '<title>' in line:
-                raw_name = re.search('<title>(.*)</title>', line).group(1)
-                if 'Library ' in raw_name:#if old samstat file
-                    raw_name = raw_name.replace('Library ', '')
-                    version = 1
-                self.convert_name_(raw_name)
-                self.name = self.name.replace('.sam', '')
-                self.convert_name_(self.name)
-                break
+        self.load_from_buffer(file_txt)
+
+    def load_from_buffer(self, data):
+        """Extracts data from the content of a .sam.html file held in
+        memory
+
+        The <title> tag and the MAPQ rows are found by searching data,
+        only their lines are copied out of it, so the plot data of large
+        files is never decoded
+
+        Args:
+            data: content of a .sam.html file, string or mmap
+        """
+        start = data.find('<title>')
+        if start != -1:
+            line_start, line_end = line_bounds(data, start)
+            version = self.load_title_(data[line_start:line_end])
+            if version == 1:
+                self.load_v1_mapq_(data, line_end)
+            else:
+                self.load_v2_mapq_(data, line_end)
 
         if not self.name:
             print "ERROR: Invalid sam file, missing a <title> tag"
             exit(1)
 
-        if version == 1:
-            for line in file_txt.split('\n'):
-                if 'MAPQ' in line or 'Unmapped' in  line:
-                    line = re.search('\(.*\((.*?)% , (.*?)\)', line)
-                    if line:
-                        self.mapq.append([line.group(1), line.group(2)])
-        else:
-            for line in file_txt.split('tr>'):
-                if '<td style="background-color: rgba(' in line and "Total" not in line:
-                    line = re.search('<td>(.*?)\.0</td>\n<td>(.*?)</td>', line)
-                    self.mapq.append([line.group(2), line.group(1)])
+    def load_v1_mapq_(self, data, start):
+        """Extracts the MAPQ categories of a version 1 file from its
+        ctx.fillText lines, see load_from_buffer
+        """
+        for line_start, line_end in find_lines(data, ['MAPQ', 'Unmapped'],
+                                               start):
+            match = V1_MAPQ.search(data[line_start:line_end])
+            if match:
+                self.mapq.append([float(match.group(1)),
+                                  int(match.group(2))])
+                if len(self.mapq) == NB_MAPQ:
+                    break
+
+    def load_v2_mapq_(self, data, start):
+        """Extracts the MAPQ categories of a version 2 file from the rows
+        of its table, see load_from_buffer
+        """
+        row_end = start
+        for line_start, line_end in find_lines(data, [V2_ROW], start):
+            if line_start < row_end or 'Total' in data[line_start:line_end]:
+                continue
+            row_end = data.find('</tr>', line_end)
+            if row_end == -1:
+                break
+            row_end = line_bounds(data, row_end)[1]
+            match = V2_MAPQ.search(data[line_start:row_end])
+            self.mapq.append([float(match.group(2)), int(match.group(1))])
+            if len(self.mapq) == NB_MAPQ:
+                break
+
+    def load_title_(self, line):
+        """Extracts the name from the <title> line
 
+        Returns:
+            the version of the samstat file, 1 or 2
+        """
+        version = 2
+        raw_name = TITLE.search(line).group(1)
+        if 'Library ' in raw_name:#if old samstat file
+            raw_name = raw_name.replace('Library ', '')
+            version = 1
+        self.convert_name_(raw_name)
+        self.name = self.name.replace('.sam', '')
+        self.convert_name_(self.name)
+        return version
 
     def load_from_file(self, file_name):
-        """Extracts data from a .sam.html file
+        """Extracts data from a .sam.html file, mapped in memory
 
         Args:
             fileName: path to a .sam.html file
         """
         try:
-            self.load_from_string(open(file_name, 'r').read())
+            with mapped_file(file_name) as data:
+                self.load_from_buffer(data)
         except IOError:
             print 'Could not open ' + file_name
+
+
+def convert_name(raw_name):
+    """Converts a name to be coherent with the other files, the name of
+    the second read of a pair gets the '.1' suffix
+
+    Args:
+        rawName: unconverted name(string)
+    """
+    return raw_name.replace('_2', '.1')
+
+
+def line_bounds(data, pos):
+    """Returns:
+        (start, end) of the line of data holding pos, end is the position
+        of its newline or the end of data
+    """
+    end = data.find('\n', pos)
+    if end == -1:
+        end = len(data)
+    return data.rfind('\n', 0, pos) + 1, end
+
+
+def find_lines(data, markers, start):
+    """Finds the lines of data holding any of markers, after start
+
+    Args:
+        data: string or mmap
+        markers: list of strings to search for
+        start: position in data where to start searching
+
+    Yields:
+        (start, end) of each line holding a marker, in order, see
+        line_bounds
+    """
+    positions = [data.find(marker, start) for marker in markers]
+    while True:
+        found = [pos for pos in positions if pos != -1]
+        if not found:
+            return
+        line_start, line_end = line_bounds(data, min(found))
+        yield line_start, line_end
+        positions = [data.find(marker, line_end) if pos != -1 else -1
+                     for marker, pos in zip(markers, positions)]
+
+
+#>=30, >=20, >=10, >=3, < 3 and Unmapped
+NB_MAPQ = 6
+TITLE = re.compile('<title>(.*)</title>')
+#ex: ctx.fillText("MAPQ >= 30 (96.8% , 10988799)", 270, 25.000000);
+V1_MAPQ = re.compile(r'\(.*\((.*?)% , (.*?)\)')
+#first line of a row of the MAPQ table, followed by the number of
+#alignments and their percentage
+V2_ROW = '<td style="background-color: rgba('
+V2_MAPQ = re.compile(r'<td>(.*?)\.0</td>\n<td>(.*?)</td>')
@@ -0,0 +1,245 @@
+"""
+Created on October 18, 2026
+"""
+from geecq.sam import convert_name
+from geecq.meta import SAMPLE_NAME
+import cPickle as pickle
+import hashlib
+import os
+import re
+import tempfile
+
+try:
+    from scandir import scandir
+except ImportError:
+    scandir = None
+
+#bump whenever the cached listings change
+SCAN_VERSION = 1
+
+#extensions removed from the file names to find the name of a sample
+SUFFIXES = ['.zip', '.html', '.txt', '.gz', '.soft', '.samstat', '_fastqc',
+            '.sam', '.bam', '.fastq', '.fq']
+#'trimmed' or 'untrimmed' as a whole token of a file name
+TRIMMED = re.compile('(^|[._-])(un)?trimmed(?=$|[._-])')
+#separators of the tokens of a path
+SEPARATORS = re.compile('[/._-]')
+
+def list_dir(path):
+    """Lists a directory in a single pass
+
+    With the scandir module, the type of each entry comes with the listing
+    and nothing is stat'ed, without it each entry is stat'ed by isdir.
+    Symbolic links to directories are not followed.
+
+    Returns:
+        (files, dirs), the sorted names of the files and directories
+    """
+    files = []
+    dirs = []
+    if scandir is not None:
+        for entry in scandir(path):
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    else:
+        for name in os.listdir(path):
+            full_path = os.path.join(path, name)
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                dirs.append(name)
+            else:
+                files.append(name)
+    return sorted(files), sorted(dirs)
+
+
+def walk(root, listings=None):
+    """Lists all files under root
+
+    Args:
+        root: directory to scan
+        listings: listings of a previous walk, the listing of a directory
+            is reused when the directory was not modified since, so only
+            the directories are stat'ed
+
+    Returns:
+        (paths, listings), the paths of the files relative to root and the
+        listings of this walk
+    """
+    previous = listings or {}
+    listings = {}
+    paths = []
+    pending = ['']
+    while pending:
+        directory = pending.pop()
+        full_path = os.path.join(root, directory)
+        try:
+            mtime = os.stat(full_path).st_mtime
+            if directory in previous and previous[directory][0] == mtime:
+                files, dirs = previous[directory][1:]
+            else:
+                files, dirs = list_dir(full_path)
+        except OSError:
+            print 'Could not open ' + full_path
+            continue
+        listings[directory] = (mtime, files, dirs)
+        paths.extend(os.path.join(directory, name) for name in files)
+        pending.extend(os.path.join(directory, name)
+                       for name in reversed(dirs))
+    return paths, listings
+
+
+def sample_name(file_name):
+    """Name of the sample of a file, normalized like the names of the
+    Sam objects so that all files of a sample get the same name
+
+    ex: SRR217326_trimmed_fastqc.zip and SRR217326.sam.html give SRR217326
+    """
+    name = os.path.basename(file_name)
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in SUFFIXES:
+            if name.endswith(suffix) and len(name) > len(suffix):
+                name = name[:-len(suffix)]
+                stripped = True
+    return convert_name(TRIMMED.sub('', name))
+
+
+def file_column(path):
+    """Column of the input file for a file found by the scan
+
+    Args:
+        path: path of the file relative to the scanned directory
+
+    Returns:
+        (column, name), column being None for files of another kind and
+        name being the name of the sample, see sample_name
+    """
+    name = os.path.basename(path)
+    #a directory or a token of the name, 'untrimmed' is another token
+    trimmed = 'trimmed' in SEPARATORS.split(path)
+    if name.endswith('_fastqc.zip'):
+        return int(trimmed), sample_name(name)
+    if name == 'fastqc_data.txt':
+        directory = os.path.basename(os.path.dirname(path))
+        if directory.endswith('_fastqc'):
+            return int(trimmed), sample_name(directory)
+    elif name.endswith('.html') and name != 'fastqc_report.html' and \
+            ('.sam' in name or '.bam' in name or 'samstat' in name):
+        return 2, sample_name(name)
+    elif name.endswith('.soft'):
+        return 3, sample_name(name)
+    return None, None
+
+
+def series_samples(path):
+    """Finds the samples of a GEO series SOFT file
+
+    Args:
+        path: path to a .soft file
+
+    Returns:
+        the GSM ids of the samples in the order of the file, or None for
+        the meta data file of a single sample
+    """
+    names = []
+    series = False
+    try:
+        with open(path, 'r') as soft_file:
+            for line in soft_file:
+                if line.startswith('^SERIES'):
+                    series = True
+                elif line.startswith('^SAMPLE'):
+                    names.append(SAMPLE_NAME.match(line).group(1))
+    except IOError:
+        print 'Could not open ' + path
+    if series or len(names) > 1:
+        return names
+    return None
+
+
+def add_file(samples, name, column, full_path):
+    """Puts full_path in the column of the line of sample name, unless
+    another file already holds it
+    """
+    line = samples.setdefault(name, ['N/A'] * 4)
+    if line[column] == 'N/A':
+        line[column] = full_path
+    else:
+        print 'Scan: %s matches the same sample as %s, skipped' % (
+            full_path, line[column])
+
+
+def pair_files(root, paths):
+    """Matches the files of each sample
+
+    The untrimmed and trimmed fastqc files, the samstat file and the meta
+    data file of a sample are matched by the name of the sample, the
+    meta data files must be named after their sample. Each sample of a
+    GEO series file is matched by its GSM id, as series.soft#GSM1234
+
+    Args:
+        root: scanned directory
+        paths: paths of the files relative to root
+
+    Returns:
+        A list with the 4 paths of each sample, sorted by name, in the
+        format of the lines of the input file
+    """
+    samples = {}
+    for path in sorted(paths):
+        column, name = file_column(path)
+        if column is None:
+            continue
+        full_path = os.path.join(root, path)
+        if column == 3:
+            gsms = series_samples(full_path)
+            if gsms is not None:
+                if not gsms:
+                    print 'Scan: %s is a series file without samples, ' \
+                          'skipped' % full_path
+                for gsm in gsms:
+                    add_file(samples, convert_name(gsm), 3,
+                             full_path + '#' + gsm)
+                continue
+        add_file(samples, name, column, full_path)
+    return [samples[name] for name in sorted(samples)]
+
+
+def scan(root, cache_path=None):
+    """Finds the files of each sample under root
+
+    Args:
+        root: directory holding fastqc zip archives (or unzipped
+            *_fastqc directories), samstat .html files and GEO .soft files
+        cache_path: directory where the listings are kept between runs,
+            or None
+
+    Returns:
+        A list with the 4 paths of each sample, see pair_files
+    """
+    root = os.path.abspath(root)
+    listings = None
+    if cache_path is not None:
+        key = hashlib.sha1('scan:' + root).hexdigest()
+        entry_path = os.path.join(cache_path, 'scan-' + key)
+        try:
+            with open(entry_path, 'rb') as entry:
+                version, listings = pickle.load(entry)
+            if version != SCAN_VERSION:
+                listings = None
+        except (IOError, OSError, EOFError, ValueError,
+                pickle.UnpicklingError):
+            listings = None
+    paths, listings = walk(root, listings)
+    if cache_path is not None:
+        try:
+            handle, temp_path = tempfile.mkstemp(dir=cache_path)
+            with os.fdopen(handle, 'wb') as entry:
+                pickle.dump((SCAN_VERSION, listings), entry,
+                            pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, entry_path)
+        except (IOError, OSError):
+            print 'Could not write cache entry ' + entry_path
+    return pair_files(root, paths)
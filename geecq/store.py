@@ -0,0 +1,205 @@
+"""
+Created on October 18, 2026
+"""
+from geecq.fastqc import Fastqc
+from geecq.sam import Sam
+from geecq.meta import Meta
+from geecq.table import search_name
+import sqlite3
+
+#bump whenever the tables change, stored in PRAGMA user_version
+SCHEMA_VERSION = 1
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS samples (
+        name TEXT PRIMARY KEY,
+        sam_name TEXT,
+        meta_name TEXT)''',
+    '''CREATE TABLE IF NOT EXISTS fastqcs (
+        sample TEXT,
+        side INTEGER,
+        file_name TEXT,
+        version INTEGER,
+        nb_sequences INTEGER,
+        gc_content INTEGER,
+        PRIMARY KEY (sample, side))''',
+    '''CREATE TABLE IF NOT EXISTS per_base_quality (
+        sample TEXT,
+        side INTEGER,
+        position INTEGER,
+        quality REAL,
+        PRIMARY KEY (sample, side, position))''',
+    '''CREATE TABLE IF NOT EXISTS histograms (
+        sample TEXT,
+        side INTEGER,
+        kind TEXT,
+        bin INTEGER,
+        value REAL,
+        PRIMARY KEY (sample, side, kind, bin))''',
+    '''CREATE INDEX IF NOT EXISTS histograms_kind ON histograms (kind, bin)''',
+    '''CREATE TABLE IF NOT EXISTS mapq (
+        sample TEXT,
+        category INTEGER,
+        percent REAL,
+        count INTEGER,
+        PRIMARY KEY (sample, category))''',
+    '''CREATE TABLE IF NOT EXISTS meta (
+        sample TEXT,
+        field TEXT,
+        value TEXT,
+        PRIMARY KEY (sample, field))''']
+
+#tables holding the data of a sample, emptied before the sample is stored
+SAMPLE_TABLES = ['fastqcs', 'per_base_quality', 'histograms', 'mapq', 'meta']
+
+class ResultStore(object):
+    """Keeps the data of the samples of many runs in an SQLite database
+
+    A sample is a row of the input file, keyed by its name as found by
+    table.search_name. Storing a sample again replaces all of its data,
+    so rows without a name, or with the name of another row of the same
+    save, are reported and not stored.
+    In the tables, side is 0 for the untrimmed fastqc and 1 for the
+    trimmed one, and the kind of a histogram is 'qual' (quality score),
+    'length' (sequence length) or 'dup' (duplication level, bin 0 being
+    the total).
+
+    Attributes:
+        path: path of the database file
+        connection: sqlite3 connection to the database
+    """
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.text_factory = str
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError('%s was written by another version of geecq'
+                             % path)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+            self.connection.execute('PRAGMA user_version = %d'
+                                    % SCHEMA_VERSION)
+
+    def save(self, input_matrix):
+        """Stores the samples of input_matrix, in a single transaction
+
+        Args:
+            input_matrix: list of lists of format (fastqc, fastqc, sam, meta)
+        """
+        names = set()
+        with self.connection:
+            for matched_list in input_matrix:
+                name = search_name(matched_list)
+                if name == '-':
+                    print 'Could not store a row without a sample name'
+                elif name in names:
+                    print 'Could not store sample %s, its name is used by ' \
+                          'another row' % name
+                else:
+                    names.add(name)
+                    self.save_sample_(matched_list, name)
+
+    def save_sample_(self, matched_list, name):
+        """Replaces the data of one sample
+        """
+        execute = self.connection.execute
+        executemany = self.connection.executemany
+        fastqcs, sam, meta = matched_list[:2], matched_list[2], \
+            matched_list[3]
+        for table in SAMPLE_TABLES:
+            execute('DELETE FROM %s WHERE sample = ?' % table, (name,))
+        execute('INSERT OR REPLACE INTO samples VALUES (?, ?, ?)',
+                (name, sam.name, meta.name))
+        for side, fastqc in enumerate(fastqcs):
+            if not fastqc.name:
+                continue
+            execute('INSERT OR REPLACE INTO fastqcs VALUES (?, ?, ?, ?, ?, ?)',
+                    (name, side, fastqc.name, fastqc.version,
+                     fastqc.nb_sequences, fastqc.gc_content))
+            executemany('INSERT OR REPLACE INTO per_base_quality '
+                        'VALUES (?, ?, ?, ?)',
+                        [(name, side, position, quality) for position, quality
+                         in enumerate(fastqc.pos_quality)])
+            histograms = [('qual', enumerate(fastqc.qual)),
+                          ('length', fastqc.seq_length),
+                          ('dup', enumerate(fastqc.dup))]
+            executemany('INSERT OR REPLACE INTO histograms '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        [(name, side, kind, x, y)
+                         for kind, histogram in histograms
+                         for x, y in histogram])
+        executemany('INSERT OR REPLACE INTO mapq VALUES (?, ?, ?, ?)',
+                    [(name, category, float(percent), int(count))
+                     for category, (percent, count) in enumerate(sam.mapq)])
+        executemany('INSERT OR REPLACE INTO meta VALUES (?, ?, ?)',
+                    [(name, field, value)
+                     for field, value in meta.meta.iteritems()])
+
+    def names(self):
+        """Returns:
+            the names of the stored samples, in the order they were last
+            stored
+        """
+        return [row[0] for row in self.connection.execute(
+            'SELECT name FROM samples ORDER BY rowid')]
+
+    def load(self, names=None):
+        """Builds the objects of stored samples back
+
+        Args:
+            names: names of the samples, all samples when None
+
+        Returns:
+            A list of lists of format (fastqc, fastqc, sam, meta) in the
+            order of names
+        """
+        if names is None:
+            names = self.names()
+        return [self.load_sample_(name) for name in names]
+
+    def load_sample_(self, name):
+        """Builds the objects of one sample back
+        """
+        execute = self.connection.execute
+        fastqcs = [Fastqc(), Fastqc()]
+        for side, file_name, version, nb_sequences, gc_content in execute(
+                'SELECT side, file_name, version, nb_sequences, gc_content '
+                'FROM fastqcs WHERE sample = ?', (name,)):
+            fastqc = fastqcs[side]
+            fastqc.name = file_name
+            fastqc.version = version
+            fastqc.nb_sequences = nb_sequences
+            fastqc.gc_content = gc_content
+        for side, quality in execute(
+                'SELECT side, quality FROM per_base_quality '
+                'WHERE sample = ? ORDER BY side, position', (name,)):
+            fastqcs[side].pos_quality.append(quality)
+        for side, kind, x, y in execute(
+                'SELECT side, kind, bin, value FROM histograms '
+                'WHERE sample = ? ORDER BY side, kind, bin', (name,)):
+            if kind == 'length':
+                fastqcs[side].seq_length.add(x, y)
+            elif kind == 'qual':
+                fastqcs[side].qual.append(y)
+            else:
+                fastqcs[side].dup.append(y)
+
+        sam = Sam()
+        meta = Meta('')
+        row = execute('SELECT sam_name, meta_name FROM samples '
+                      'WHERE name = ?', (name,)).fetchone()
+        if row is not None:
+            sam.name, meta.name = row
+        sam.mapq = [[percent, count] for percent, count in execute(
+            'SELECT percent, count FROM mapq WHERE sample = ? '
+            'ORDER BY category', (name,))]
+        meta.meta = dict(execute('SELECT field, value FROM meta '
+                                 'WHERE sample = ?', (name,)))
+        return [fastqcs[0], fastqcs[1], sam, meta]
+
+    def close(self):
+        """Closes the database
+        """
+        self.connection.close()
@@ -3,50 +3,136 @@ Created on January 25, 2014
 
 @author: Jonathan Laperle(jonathan.laperle@usherbrooke.ca)
 """
-import others
+from geecq.cohort import short_stats, cohort_short_stats
+
+class TableLayout(object):
+    """Columns of the long table which depend on the fastqc files, computed
+    once and shared by the header and row builders
+
+    Attributes:
+        max_qual: number of quality score columns per fastqc
+        min_length: first length of the Sequence Length Distribution
+            columns, None when there is no fastqc file
+        max_length: last length of the Sequence Length Distribution
+            columns, None when there is no fastqc file
+    """
+    def __init__(self, max_qual, min_length, max_length):
+        self.max_qual = max_qual
+        self.min_length = min_length
+        self.max_length = max_length
+
+    @classmethod
+    def from_row(cls, matched_list):
+        """Finds the columns needed by one row
+
+        Args:
+            matched_list: list of format (fastqc, fastqc, sam, meta)
+        """
+        max_qual = 0
+        min_length = max_length = None
+        for fastqc in matched_list[:2]:
+            max_qual = max(max_qual, len(fastqc.qual))
+            if fastqc.name:
+                first = fastqc.seq_length.min_length
+                last = fastqc.seq_length.max_length()
+                if min_length is None or first < min_length:
+                    min_length = first
+                if max_length is None or last > max_length:
+                    max_length = last
+        return cls(max_qual, min_length, max_length)
+
+    @classmethod
+    def from_matched_lists(cls, matched_lists):
+        """Finds the columns needed by all rows in a single pass
+
+        Returns:
+            the layout, None if no row has a fastqc file
+        """
+        return cls.merge(cls.from_row(row) for row in matched_lists)
+
+    @classmethod
+    def merge(cls, layouts):
+        """Merges the layouts of many rows
+
+        Returns:
+            the layout fitting all rows, None if no row has a fastqc file
+        """
+        merged = cls(0, None, None)
+        for layout in layouts:
+            merged.max_qual = max(merged.max_qual, layout.max_qual)
+            if layout.min_length is None:
+                continue
+            if merged.min_length is None or \
+                    layout.min_length < merged.min_length:
+                merged.min_length = layout.min_length
+            if merged.max_length is None or \
+                    layout.max_length > merged.max_length:
+                merged.max_length = layout.max_length
+        if merged.min_length is None:
+            return None
+        return merged
+
+    def dimensions(self):
+        """The layout as [max_qual, min_length, max_length], the same
+        layout is built back by TableLayout(*dimensions)
+        """
+        return [self.max_qual, self.min_length, self.max_length]
+
+    def nb_lengths(self):
+        """Number of Sequence Length Distribution columns per fastqc
+        """
+        return self.max_length - self.min_length + 1
+
+    def __eq__(self, other):
+        return isinstance(other, TableLayout) and \
+            self.dimensions() == other.dimensions()
+
+    def __ne__(self, other):
+        return not self == other
+
+#number of rows whose short table statistics are computed at once
+STATS_BLOCK = 1024
 
 class Table(object):
     """Used to generate .TAB tables from fastqc/sam/meta files
 
+    The rows are built one at a time by iter_short() and iter_long(), so
+    a table can be written without being held in memory
+
     Attributes:
         matchedList:
         path: output path
+        layout: TableLayout of the long table, defaults to the one of
+            matchedList which is only found when the long table is built
     """
-    def __init__(self, matchedLists):
+    def __init__(self, matchedLists, layout=None):
         self.matched_lists = matchedLists
         self.short_csv = []
         self.long_csv = []
+        self.layout_ = layout
 
-    def max_qual_(self):
-        """Maxmimal quality value for all fastqc objects
-        """
-        return max([max([len(qc.qual) for qc in \
-            [row[0] for row in self.matched_lists]]), \
-            max([len(qc.qual) for qc in \
-            [row[1] for row in self.matched_lists]])])
+    @property
+    def layout(self):
+        if self.layout_ is None:
+            self.layout_ = TableLayout.from_matched_lists(self.matched_lists)
+        return self.layout_
 
-    def min_length_(self):
-        """Minimal length for all fastqc objects
-        """
-        temp = []
-        for i in range(2):
-            for fastqc in [row[i] for row in self.matched_lists]:
-                if fastqc.name:
-                    temp.append(fastqc.seq_length[0][0])
-        return min(temp)
+    @classmethod
+    def from_store(cls, store, names=None):
+        """Builds the tables of samples kept in a ResultStore, without
+        reading their files again
 
-    def max_length_(self):
-        """Maximal length for all fastqc objects in fastqcList
+        Args:
+            store: geecq.store.ResultStore
+            names: names of the samples, all samples when None
         """
-        temp = []
-        for i in range(2):
-            for fastqc in [row[i] for row in self.matched_lists]:
-                if fastqc.name:
-                    temp.append(fastqc.seq_length[-1][0])
-        return max(temp)
+        return cls(store.load(names))
 
     def header_short_(self):
-        """Writes the header for the short table file
+        """Generates the header for the short table file
+
+        Returns:
+            the header as a list
         """
         short_header = ['File Name',
                         'Library Name',
@@ -75,14 +161,17 @@ class Table(object):
                         'MAPQ < 3 or unmapped (%)',
                         'MAPQ < 3 or unmapped']
 
-        self.short_csv.append(short_header)
+        return short_header
 
     def header_long_(self):
-        """writes the header for the long table file
+        """Generates the header for the long table file
+
+        Returns:
+            the 3 levels of the header
         """
-        self.long_csv.append(self.first_header_level_())
-        self.long_csv.append(self.second_header_level_())
-        self.long_csv.append(self.third_header_level_())
+        return [self.first_header_level_(),
+                self.second_header_level_(),
+                self.third_header_level_()]
 
     def first_header_level_(self):
         """Generates the first level for the long table's header
@@ -98,10 +187,10 @@ class Table(object):
             first_header += empty_slot(19)
         for _ in range(2):
             first_header.append('Number of sequences per quality score')
-            first_header += empty_slot(self.max_qual_()-1)
+            first_header += empty_slot(self.layout.max_qual - 1)
         for _ in range(2):
             first_header.append('Sequence Length Distribution')
-            first_header += empty_slot(self.max_length_() - self.min_length_())
+            first_header += empty_slot(self.layout.nb_lengths() - 1)
         for _ in range(2):
             first_header.append('Sequences duplication levels')
             first_header += empty_slot(10)
@@ -132,8 +221,8 @@ class Table(object):
         #Sequence Length Distribution
         #Sequences duplication levels
         for nb_empty in [19,
-                         self.max_qual_() - 1,
-                         self.max_length_() - self.min_length_(),
+                         self.layout.max_qual - 1,
+                         self.layout.nb_lengths() - 1,
                          10]:
             second_header += ['Untrimmed'] + empty_slot(nb_empty)
             second_header += ['Trimmed'] + empty_slot(nb_empty)
@@ -161,12 +250,12 @@ class Table(object):
 
         #Per sequence quality scores
         for _ in range(2):
-            third_header += [str(i) for i in range(self.max_qual_())]
+            third_header += [str(i) for i in range(self.layout.max_qual)]
 
         #Sequence Length Distribution
         for _ in range(2):
-            third_header += [str(i) for i in range(self.min_length_(),
-                                                   self.max_length_()+1)]
+            third_header += [str(i) for i in range(self.layout.min_length,
+                                                   self.layout.max_length+1)]
 
         #Sequences duplication levels
         for i in range(2):
@@ -190,8 +279,8 @@ class Table(object):
 
         return third_header
 
-    def table_short_(self, matched_list):
-        """Appends the content of the short table for matching
+    def table_short_(self, matched_list, stats=None):
+        """Generates the row of the short table for matching
         before/after/sam/meta files
 
         Args:
@@ -199,8 +288,14 @@ class Table(object):
             qcafter: Fastqc object after trimming
             sam: Sam object
             meta: Meta object
+            stats: short_stats of both fastqc objects if already computed
+
+        Returns:
+            the row as a list
         """
         fastqcs = [matched_list[0], matched_list[1]]
+        if stats is None:
+            stats = [short_stats(fastqc) for fastqc in fastqcs]
         sam = matched_list[2]
         meta = matched_list[3]
         empty = ['-']
@@ -228,38 +323,35 @@ class Table(object):
                 output += empty
 
         #Average base sequence quality for first and last 10 bases
-        for fastqc in fastqcs:
-            if fastqc.pos_quality:
-                output.append(str(others.mean(fastqc.pos_quality[:10])))
-                output.append(str(others.mean(fastqc.pos_quality[-10:])))
+        for stat in stats:
+            if stat['first_10'] is not None:
+                output.append(str(stat['first_10']))
+                output.append(str(stat['last_10']))
             else:
                 output += empty * 2
 
         #Mode for sequence quality scores and how many sequences ahve the mode
         #in absolute and %
-        for fastqc in fastqcs:
-            if fastqc.qual:
-                i = others.argmax(fastqc.qual)
-                output += [str(i)]
-                output += [str(fastqc.qual[i]/sum(fastqc.qual))]
+        for stat in stats:
+            if stat['qual_mode'] is not None:
+                output += [str(stat['qual_mode'])]
+                output += [str(stat['qual_mode_share'])]
             else:
                 output += empty * 2
 
         #Mode for sequence lengthand how many sequences ahve the mode
         #in absolute and %
-        for fastqc in fastqcs:
-            if fastqc.seq_length:
-                i = others.argmax([row[1] for row in fastqc.seq_length])
-                output += [str(fastqc.seq_length[i][0])]
-                output += [str(fastqc.seq_length[i][1]/\
-                           sum([row[1] for row in fastqc.seq_length]))]
+        for stat in stats:
+            if stat['length_mode'] is not None:
+                output += [str(stat['length_mode'])]
+                output += [str(stat['length_mode_share'])]
             else:
                 output += empty * 2
 
         #Total duplication levels (%)
-        for fastqc in fastqcs:
-            if fastqc.dup:
-                output += [str(fastqc.dup[0])]
+        for stat in stats:
+            if stat['dup_total'] is not None:
+                output += [str(stat['dup_total'])]
             else:
                 output += empty * 2
 
@@ -273,10 +365,10 @@ class Table(object):
         else:
             output += empty * 6
 
-        self.short_csv.append(output)
+        return output
 
     def table_long_(self, matched_list):
-        """Appends the content of the short table for matching
+        """Generates the row of the long table for matching
         before/after/sam/meta files
 
         Args:
@@ -284,6 +376,9 @@ class Table(object):
             qcafter: Fastqc object after trimming
             sam: Sam object
             meta: Meta object
+
+        Returns:
+            the row as a list
         """
         fastqcs = [matched_list[0], matched_list[1]]
         sam = matched_list[2]
@@ -343,7 +438,7 @@ class Table(object):
 
         #Per sequence quality scores
         for fastqc in fastqcs:
-            for i in range(self.max_qual_()):
+            for i in range(self.layout.max_qual):
                 if fastqc.qual:
                     if i < len(fastqc.qual):
                         output += [str(fastqc.qual[i])]
@@ -354,12 +449,12 @@ class Table(object):
 
         #Sequence Length Distribution
         for fastqc in fastqcs:
-            for i in range(self.min_length_(), self.max_length_()+1):
+            for i in range(self.layout.min_length,
+                           self.layout.max_length+1):
                 if fastqc.seq_length:
-                    if i in [row[0] for row in fastqc.seq_length]:
-                        temp = [row[0] for row in fastqc.seq_length]
-                        temp2 = fastqc.seq_length[temp.index(i)][1]
-                        output += [str(temp2)]
+                    count = fastqc.seq_length.get(i)
+                    if count is not None:
+                        output += [str(count)]
                     else:
                         output += ['0']
                 else:
@@ -371,7 +466,8 @@ class Table(object):
                 for i in fastqc.dup:
                     output += [str(i)]
             else:
-                output += empty * 17
+                #Total and the 10 levels written for a loaded module
+                output += empty * 11
 
         #MAPQ >=30, >=20, >=10, >=3, < 3, Unmapped  (nb)
         if sam.mapq:
@@ -381,17 +477,38 @@ class Table(object):
             for i in range(6):
                 output += empty*2
 
-        self.long_csv.append(output)
+        return output
+
+    def iter_short(self):
+        """Yields the header and then each row of the short table
+
+        The statistics are computed for STATS_BLOCK rows at a time
+        """
+        yield self.header_short_()
+        for start in xrange(0, len(self.matched_lists), STATS_BLOCK):
+            block = self.matched_lists[start:start + STATS_BLOCK]
+            stats = [cohort_short_stats([row[i] for row in block])
+                     for i in range(2)]
+            for matched_list, stats_before, stats_after in zip(
+                    block, stats[0], stats[1]):
+                yield self.table_short_(matched_list,
+                                        [stats_before, stats_after])
+
+    def iter_long(self):
+        """Yields the 3 levels of the header and then each row of the
+        long table
+        """
+        for header in self.header_long_():
+            yield header
+        for matched_list in self.matched_lists:
+            yield self.table_long_(matched_list)
 
     def make_tables(self):
         """Matches the different lists with one another, based on filename
             and generates the tables
         """
-        self.header_short_()
-        self.header_long_()
-        for matched_list in self.matched_lists:
-            self.table_short_(matched_list)
-            self.table_long_(matched_list)
+        self.short_csv = list(self.iter_short())
+        self.long_csv = list(self.iter_long())
         return self.short_csv, self.long_csv
 
 
@@ -418,6 +535,52 @@ def search_name(matched_list):
     return name
 
 
+def repad_long_row(row, old_layout, new_layout):
+    """Fits a row of the long table built for old_layout to the
+    columns of new_layout
+
+    Quality scores and lengths outside of a fastqc's own range are '0',
+    so the row is padded with '0' (or '-' for a missing fastqc) or
+    cropped without its files being parsed again
+
+    Args:
+        row: list of cells of the long table
+        old_layout: TableLayout row was built for
+        new_layout: TableLayout to fit
+
+    Returns:
+        the new row
+    """
+    old_qual, old_min, old_max = old_layout.dimensions()
+    new_qual, new_min, new_max = new_layout.dimensions()
+    output = row[:50]
+    pos = 50
+
+    #Per sequence quality scores
+    for _ in range(2):
+        block = row[pos:pos + old_qual]
+        if block and block[0] == '-':
+            output += ['-'] * new_qual
+        else:
+            output += block[:new_qual] + ['0'] * (new_qual - old_qual)
+        pos += old_qual
+
+    #Sequence Length Distribution
+    for _ in range(2):
+        block = row[pos:pos + old_max - old_min + 1]
+        if block and block[0] == '-':
+            output += ['-'] * (new_max - new_min + 1)
+        else:
+            for i in range(new_min, new_max + 1):
+                if old_min <= i <= old_max:
+                    output.append(block[i - old_min])
+                else:
+                    output.append('0')
+        pos += old_max - old_min + 1
+
+    return output + row[pos:]
+
+
 def empty_slot(nb_empty):
     """Return a list of n empty strings
     """
@@ -5,15 +5,74 @@ Created on May 8, 2014
 """
 from geecq.fastqc import Fastqc
 from geecq.sam import Sam
-from geecq.meta import Meta
-from geecq.table import Table
-from geecq.graph import GraphMaker
+from geecq.meta import Meta, MetaSeries, split_series_path
+from geecq.table import Table, TableLayout, repad_long_row, search_name
+from geecq.graph import GraphMaker, render_graphs
+from geecq.render import make_renderer, RENDERERS
+from geecq.cache import ParseCache
+from geecq.registry import LoadRegistry
+from geecq.scan import scan
+from geecq.columnar import NpzWriter
+from geecq.store import ResultStore
+from geecq.profiling import Profiler, stage
+import geecq.cache
 import os
 import sys
 import getopt
 import csv
+import json
 
-def load_from_input(input_file):
+#describes the rows of the tables for --incremental
+MANIFEST = 'tableManifest.json'
+#bump whenever the rows of the tables change, the tables of an older
+#version are built again
+MANIFEST_VERSION = 3
+
+#outputs selected with --outputs
+OUTPUTS = ['short', 'long', 'graphs-before', 'graphs-after']
+#columns of the input file loaded for each output, the tables use every
+#module of the fastqc files while a set of graphs only uses its fastqc
+OUTPUT_COLUMNS = {'short': [0, 1, 2, 3],
+                  'long': [0, 1, 2, 3],
+                  'graphs-before': [0],
+                  'graphs-after': [1]}
+
+def row_files(line, columns=None):
+    """Files to load for one line of the input file
+
+    Args:
+        line: list of the 4 paths found on a line of the input file
+        columns: indexes of the columns to load, all of them when None
+
+    Returns:
+        A tuple (files, errors) where files is a list of
+        (index, class, path, loader, args) for each file to load in the
+        row, see LoadRegistry.add, and errors is the list of paths that
+        could not be read
+    """
+    files = []
+    errors = []
+    meta_path, gsm = split_series_path(line[3])
+    for i, path in enumerate(line[:3] + [meta_path]):
+        if path == 'N/A' or (columns is not None and i not in columns):
+            continue
+        if not os.access(path, os.R_OK):
+            errors.append(path)
+        elif i < 2:
+            if path.endswith('.zip'):
+                files.append((i, Fastqc, path, 'load_from_zip', ()))
+            else:
+                files.append((i, Fastqc, path, 'load_from_file', ()))
+        elif i == 2:
+            files.append((i, Sam, path, 'load_from_file', ()))
+        elif gsm is None:
+            files.append((i, Meta, path, 'load_from_file',
+                          (path.split('/')[-1],)))
+        else:
+            files.append((i, MetaSeries, path, 'load_from_file', ()))
+    return files, errors
+
+def load_from_input(input_file, jobs=1, cache=None):
     r"""Loads objects from the filepaths provided in inputFile
 
     Args:
@@ -25,34 +84,92 @@ def load_from_input(input_file):
             misisng files must be named N\A
             fastqc can be a zip archive but the file must than be named
             fastqc_data.txt
+            meta can be a sample of a GEO series SOFT file, ex:
+            GSE1234_family.soft#GSM5678
+        jobs: number of processes used to load the rows, rows are
+            returned in the same order as the input file either way
+        cache: ParseCache used to load the files, or None
 
     Returns:
         A list of lists with each inner list being of format
         (fastqc, fastqc, sam, meta), each of those being files for the same
         sequencing
     """
-    input_matrix = []
+    input_matrix = load_rows(read_input(input_file), jobs, cache)
+    verify_input_matrix(input_matrix)
+    return input_matrix
+
+def read_input(input_file):
+    """Reads the paths of the input file
+
+    Args:
+        inputFile: the path to the inputFile, see load_from_input
+
+    Returns:
+        A list with the 4 paths of each line
+    """
+    lines = []
     with open(input_file, 'r') as in_file:
         for line in in_file:
             line = line.split()
             if len(line) != 4:
                 print "Error: Every line should contain 4 elements"
                 exit(0)
-            fastqcs = [Fastqc(), Fastqc()]
-            for i in range(2):
-                if line[i] != 'N/A':
-                    if line[i].endswith('.zip'):
-                        fastqcs[i].load_from_zip(line[i])
-                    else:
-                        fastqcs[i].load_from_file(line[i])
-            sam = Sam()
-            if line[2] != 'N/A':
-                sam.load_from_file(line[2])
-            meta = Meta(line[3].split('/')[-1])
-            if line[3] != 'N/A':
-                meta.load_from_file(line[3])
-            input_matrix.append([fastqcs[0], fastqcs[1], sam, meta])
-    verify_input_matrix(input_matrix)
+            lines.append(line)
+    return lines
+
+def load_rows(lines, jobs=1, cache=None, profiler=None, columns=None):
+    """Loads the objects of many lines of the input file
+
+    A file found on many lines, or in many columns, is loaded once and
+    its object is shared by the rows
+
+    Args:
+        lines: list with the 4 paths of each line to load
+        jobs: number of processes used to load the files
+        cache: ParseCache used to load the files, or None
+        profiler: Profiler recording the load and the time of each file,
+            or None
+        columns: indexes of the columns to load, all of them when None,
+            the objects of the other columns are left empty
+
+    Returns:
+        A list of lists of format (fastqc, fastqc, sam, meta) in the same
+        order as lines
+    """
+    registry = LoadRegistry()
+    rows_files = []
+    for line_nb, line in enumerate(lines, 1):
+        files, errors = row_files(line, columns)
+        for path in errors:
+            print 'Line %d: could not open %s' % (line_nb, path)
+        for _, cls, path, loader, args in files:
+            registry.add(cls, path, loader, *args)
+        rows_files.append(files)
+    with stage(profiler, 'load'):
+        registry.load(jobs, cache)
+    if profiler is not None:
+        for key, (wall, cpu) in sorted(registry.timings.items()):
+            profiler.record_file(key[2], key[1], wall, cpu)
+        profiler.saved_loads += registry.saved()
+    if cache is not None:
+        cache.prune()
+
+    input_matrix = []
+    for line_nb, (line, files) in enumerate(zip(lines, rows_files), 1):
+        gsm = split_series_path(line[3])[1]
+        row = [Fastqc(), Fastqc(), Sam(),
+               Meta(line[3].split('/')[-1] if gsm is None else gsm)]
+        for i, cls, path, loader, _ in files:
+            obj = registry.get(cls, path, loader)
+            if cls is MetaSeries:
+                if gsm not in obj.samples:
+                    print 'Line %d: no sample %s in %s' % (line_nb, gsm,
+                                                           path)
+                    continue
+                obj = obj.samples[gsm]
+            row[i] = obj
+        input_matrix.append(row)
     return input_matrix
 
 def verify_input_matrix(input_matrix):
@@ -93,7 +210,12 @@ def prepare_output_dir(output_path):
 def usage():
     """Prints the proper usage for main.py
     """
-    print 'Usage: python main.py -i <inputfile> -o <outputpath>'
+    print 'Usage: python main.py -i <inputfile>|--scan <directory>|' \
+          '--from-store <database> -o <outputpath> [--jobs N] ' \
+          '[--cache-dir <cachepath>] [--no-cache] [--incremental] ' \
+          '[--renderer python|R] [--npz] [--store <database>] ' \
+          '[--profile] [--profile-dump <directory>] ' \
+          '[--outputs short,long,graphs-before,graphs-after]'
 
 def no_input():
     """Warns about empty input file
@@ -101,41 +223,297 @@ def no_input():
     print 'Input file is empty.'
 
 def write_csv(table, path):
-    csv_file = csv.writer(open(path, 'w'), dialect='excel-tab')
-    for line in table:
-        csv_file.writerow(line)
+    """Writes the rows of table as they come, table can be a generator
+
+    Args:
+        table: iterable of rows
+        path: path of the .tab file
+    """
+    with open(path, 'w') as out_file:
+        csv_file = csv.writer(out_file, dialect='excel-tab')
+        for line in table:
+            csv_file.writerow(line)
+
+def write_long_table(rows, output_path, npz=False):
+    """Writes the long table to tableLong.tab, and to tableLong.npz when
+    npz is True, in a single pass over rows
+
+    Args:
+        rows: iterable of the rows of the long table, header included
+        output_path: the output/ directory
+        npz: True to also write the table in numpy's .npz format
+    """
+    if not npz:
+        write_csv(rows, output_path + 'tableLong.tab')
+        return
+    with NpzWriter(output_path + 'tableLong.npz') as npz_writer:
+
+        def recorded_rows():
+            """Yields rows after adding each of them to the .npz file
+            """
+            for row in rows:
+                npz_writer.add(row)
+                yield row
+
+        write_csv(recorded_rows(), output_path + 'tableLong.tab')
+
+def read_csv(path):
+    """Reads back a table written by write_csv
+
+    Returns:
+        the table as a list of rows, empty if it could not be read
+    """
+    try:
+        with open(path, 'r') as csv_file:
+            return list(csv.reader(csv_file, dialect='excel-tab'))
+    except IOError:
+        return []
 
-def launch(input_matrix, output_path):
+def file_stamps(line):
+    """Size and modification time of the files of a line of the input file
+
+    Returns:
+        a list of [size, mtime] or None for each missing file
+    """
+    stamps = []
+    for path in line[:3] + [split_series_path(line[3])[0]]:
+        try:
+            stat = os.stat(path)
+            stamps.append([stat.st_size, stat.st_mtime])
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+def read_manifest(output_path):
+    """Reads the manifest describing the rows of the current tables
+
+    Returns:
+        the manifest, or None if there is no complete previous run
+    """
+    try:
+        with open(output_path + MANIFEST, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+    except (IOError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def write_manifest(manifest, output_path):
+    """Writes the manifest describing the rows of the current tables
+    """
+    manifest['version'] = MANIFEST_VERSION
+    with open(output_path + MANIFEST, 'w') as manifest_file:
+        json.dump(manifest, manifest_file)
+
+def remove_manifest(output_path):
+    """Removes the manifest of a previous --incremental run, for the
+    outputs about to be written without it
+    """
+    try:
+        os.remove(output_path + MANIFEST)
+    except OSError:
+        pass
+
+def output_columns(outputs):
+    """Returns:
+        the indexes of the columns of the input file needed by outputs
+    """
+    return sorted(set(i for output in outputs
+                      for i in OUTPUT_COLUMNS[output]))
+
+def graph_sides(outputs):
+    """Returns:
+        the indexes of the fastqc columns whose graphs are in outputs,
+        0 for the untrimmed files and 1 for the trimmed ones
+    """
+    return [i for i, output in enumerate(['graphs-before', 'graphs-after'])
+            if output in outputs]
+
+def launch(input_matrix, output_path, renderer=None, jobs=1, npz=False,
+           profiler=None, outputs=OUTPUTS):
     """Does multiple checks to ensure the list has the nessessary data
     and launches the modules to produce output
 
     Args:
         input_matrix: input file in matrix format
+        renderer: object drawing the graphs, see geecq.render
+        jobs: number of graphs drawn at the same time
+        npz: True to also write the long table in numpy's .npz format
+        profiler: Profiler recording the stages, or None
+        outputs: outputs to produce, see OUTPUTS
     """
     has_ntrimmed = has_fastqc([row[0] for row in input_matrix])
     has_trimmed = has_fastqc([row[1] for row in input_matrix])
 
     output_path = output_path + 'output/'
+    #the tables and graphs written here are not described by the manifest
+    remove_manifest(output_path)
+
+    if 'short' in outputs or 'long' in outputs:
+        if has_ntrimmed or has_trimmed:
+            table = Table(input_matrix)
+            if 'short' in outputs:
+                with stage(profiler, 'short table'):
+                    write_csv(table.iter_short(),
+                              output_path + 'tableShort.tab')
+            if 'long' in outputs:
+                with stage(profiler, 'long table'):
+                    write_long_table(table.iter_long(), output_path, npz)
+        else:
+            print 'No valid fastqc file, could not produce tables'
+    if graph_sides(outputs):
+        with stage(profiler, 'graphs'):
+            make_graphs(input_matrix, output_path, renderer, jobs,
+                        graph_sides(outputs))
+
+def make_graphs(input_matrix, output_path, renderer=None, jobs=1,
+                sides=(0, 1)):
+    """Generates the graphs of the untrimmed and trimmed fastqc files
+
+    The graphs of both sets are drawn concurrently, the status and time
+    of each graph is written to graphs.tab
 
-    if has_ntrimmed or has_trimmed:
-        table_short, table_long = Table(input_matrix).make_tables()
-        write_csv(table_short, output_path + 'tableShort.tab')
-        write_csv(table_long, output_path + 'tableLong.tab')
+    Args:
+        input_matrix: input file in matrix format
+        output_path: the output/ directory
+        renderer: object drawing the graphs, see geecq.render
+        jobs: number of graphs drawn at the same time
+        sides: 0 to draw the graphs of the untrimmed files and 1 for the
+            trimmed ones
+    """
+    if renderer is None:
+        renderer = make_renderer()
+    graph_makers = []
+    for side in sides:
+        fastqc_list = [row[side] for row in input_matrix]
+        if has_fastqc(fastqc_list):
+            graph_makers.append(GraphMaker(fastqc_list, output_path +
+                                           ['before/', 'after/'][side],
+                                           renderer))
+        else:
+            print 'No valid %s fastqc file, some graphs will not be ' \
+                  'produced' % ['untrimmed', 'trimmed'][side]
+    summary = [['Graph', 'Status', 'Time (s)']]
+    for path, status, seconds in render_graphs(graph_makers, renderer, jobs):
+        if status != 'ok':
+            print 'Could not draw %s.png: %s' % (path, status)
+        summary.append([path[len(output_path):] + '.png', status,
+                        '-' if seconds is None else '%.3f' % seconds])
+    write_csv(summary, output_path + 'graphs.tab')
+
+def launch_incremental(lines, output_path, jobs=1, cache=None,
+                       renderer=None, npz=False, store=None, profiler=None,
+                       outputs=OUTPUTS):
+    """Updates the output of a previous run, only the rows whose files
+    changed are loaded and rebuilt
+
+    The rows of the previous tables are reused as they are for the short
+    table and re-padded to the new columns for the long table. A previous
+    row is only reused when its name matches the one recorded in the
+    manifest. The graphs cover the whole input, the manifest lists the
+    sides drawn for its rows and a side is only drawn again when a row
+    changed, was added or was removed. Both tables are always updated
+    since the manifest describes both of them, outputs only selects the
+    graphs.
+
+    Args:
+        lines: list with the 4 paths of each line of the input file
+        output_path: path to a directory where to output will be written
+        jobs: number of processes used to load the rows
+        cache: ParseCache used to load the files, or None
+        renderer: object drawing the graphs, see geecq.render
+        npz: True to also write the long table in numpy's .npz format
+        store: ResultStore where the rows loaded again are saved, or None
+        profiler: Profiler recording the stages, or None
+        outputs: outputs to produce, see OUTPUTS
+    """
+    verify_input_matrix(lines)
+    output_path = output_path + 'output/'
+    manifest = read_manifest(output_path)
+    previous = {}
+    if manifest:
+        old_short = read_csv(output_path + 'tableShort.tab')[1:]
+        old_long = read_csv(output_path + 'tableLong.tab')[3:]
+        if len(old_short) == len(old_long) == len(manifest['rows']):
+            for entry, short_row, long_row in zip(manifest['rows'],
+                                                   old_short, old_long):
+                if short_row[0] == long_row[0] == entry['search_name']:
+                    previous[tuple(entry['files'])] = (entry, short_row,
+                                                       long_row)
+
+    stamps = [file_stamps(line) for line in lines]
+    changed = [i for i, line in enumerate(lines)
+               if tuple(line) not in previous or
+               previous[tuple(line)][0]['stamps'] != stamps[i]]
+    loaded = dict(zip(changed, load_rows([lines[i] for i in changed],
+                                         jobs, cache, profiler)))
+    if store is not None:
+        with stage(profiler, 'store'):
+            store.save([loaded[i] for i in changed])
+
+    entries = []
+    for i, line in enumerate(lines):
+        if i in loaded:
+            entries.append({'files': line,
+                            'stamps': stamps[i],
+                            'search_name': search_name(loaded[i]),
+                            'fastqcs': [bool(loaded[i][0].name),
+                                        bool(loaded[i][1].name)],
+                            'dimensions': TableLayout.from_row(
+                                loaded[i]).dimensions()})
+        else:
+            entries.append(previous[tuple(line)][0])
+
+    layout = TableLayout.merge(TableLayout(*entry['dimensions'])
+                               for entry in entries)
+    if layout:
+        table = Table([loaded[i] for i in changed], layout)
+
+        def merged_rows(new_rows, nb_headers, index):
+            """Yields the headers and rows of new_rows, with the rows of
+            the previous table in place of the unchanged lines
+            """
+            for _ in range(nb_headers):
+                yield next(new_rows)
+            for i, line in enumerate(lines):
+                if i in loaded:
+                    yield next(new_rows)
+                elif index == 1:
+                    yield previous[tuple(line)][1]
+                else:
+                    yield repad_long_row(previous[tuple(line)][2],
+                                         TableLayout(*manifest['dimensions']),
+                                         layout)
+
+        with stage(profiler, 'short table'):
+            write_csv(merged_rows(table.iter_short(), 1, 1),
+                      output_path + 'tableShort.tab')
+        with stage(profiler, 'long table'):
+            write_long_table(merged_rows(table.iter_long(), 3, 2),
+                             output_path, npz)
     else:
         print 'No valid fastqc file, could not produce tables'
-    if has_ntrimmed:
-        GraphMaker([row[0] for row in input_matrix],
-                   output_path + 'before/').generate_all()
-    else:
-        print 'No valid untrimmed fastqc file, ' \
-              'some graphs will not be produced'
-    if has_trimmed:
-        GraphMaker([row[1] for row in input_matrix],
-                   output_path + 'after/').generate_all()
-    else:
-        print 'No valid trimmed fastqc file, ' \
-              'some graphs will not be produced'
 
+    #the graphs of the previous run still cover the same rows
+    drawn = []
+    if manifest and not changed and \
+            [entry['files'] for entry in manifest['rows']] == lines:
+        drawn = manifest.get('graphs', [])
+    sides = [side for side in graph_sides(outputs) if side not in drawn]
+    if sides:
+        input_matrix = [loaded[i] if i in loaded else None
+                        for i in range(len(lines))]
+        missing = [i for i, row in enumerate(input_matrix) if row is None]
+        for i, row in zip(missing, load_rows([lines[i] for i in missing],
+                                             jobs, cache, profiler, sides)):
+            input_matrix[i] = row
+        with stage(profiler, 'graphs'):
+            make_graphs(input_matrix, output_path, renderer, jobs, sides)
+    if layout:
+        write_manifest({'dimensions': layout.dimensions(), 'rows': entries,
+                        'graphs': sorted(set(drawn) | set(sides))},
+                       output_path)
 
 def main(argv):
     r"""Takes 2 arguments, -i and -o form the command line and calls the proper
@@ -149,13 +527,64 @@ def main(argv):
             misisng files must be named N\A
             fastqc can be a zip archive but the file must than be named
             fastqc_data.txt
+            meta can be a sample of a GEO series SOFT file, ex:
+            GSE1234_family.soft#GSM5678
+        --scan: directory to search for the files instead of an input
+            file, the files of each sample are matched by name, the
+            samples of a GEO series SOFT file by their GSM id, and the
+            resulting input file is written to output/scanInput.tab
         -o: path to a directory where to output will be written
+        --jobs(-j): number of processes used to load the input files and
+            of graphs drawn at the same time, defaults to 1
+        --cache-dir: directory of the parse cache, defaults to
+            ~/.cache/geecq
+        --no-cache: parses every input file, without reading or writing
+            the parse cache
+        --incremental: updates the tables of a previous run in the same
+            output directory, only the rows whose files changed are loaded
+        --renderer: python to draw the graphs with matplotlib or R to
+            draw them with Rscript, defaults to python when matplotlib
+            is installed
+        --store: SQLite database where the data of each sample is saved,
+            samples already in it are replaced, rows without a name or
+            repeating the name of another row are not saved
+        --from-store: SQLite database written by --store, the output is
+            made from all of its samples instead of an input file
+        --profile: records the wall time, CPU time and peak memory of each
+            stage, the time spent loading each file and the number of
+            loads saved by sharing repeated files into output/profile.json
+            and prints the slowest files
+        --profile-dump: directory receiving a cProfile dump of each
+            stage, implies --profile
+        --outputs: comma separated outputs to produce among short (short
+            table), long (long table), graphs-before (graphs of the
+            untrimmed files) and graphs-after (graphs of the trimmed
+            files), defaults to all of them. Only the files needed by the
+            selected outputs are loaded, unless --store is given.
+            --incremental always updates both tables
+        --npz: also writes the long table as output/tableLong.npz, to be
+            loaded with numpy.load
         --help(-h): prints proper usage syntax
     """
     input_file = ''
+    scan_path = ''
     output_path = ''
+    jobs = 1
+    cache_path = geecq.cache.DEFAULT_PATH
+    use_cache = True
+    incremental = False
+    renderer_name = None
+    npz = False
+    store_path = ''
+    from_store = ''
+    profiler = None
+    outputs = OUTPUTS
     try:
-        opts, _ = getopt.getopt(argv, "hi:o:", ["help"])
+        opts, _ = getopt.getopt(argv, "hi:o:j:",
+                                ["help", "scan=", "jobs=", "cache-dir=",
+                                 "no-cache", "incremental", "renderer=",
+                                 "npz", "store=", "from-store=", "profile",
+                                 "profile-dump=", "outputs="])
     except getopt.GetoptError:
         usage()
         sys.exit(2)
@@ -165,15 +594,87 @@ def main(argv):
             sys.exit()
         elif opt == "-i":
             input_file = arg
+        elif opt == "--scan":
+            scan_path = arg
         elif opt == "-o":
             output_path = arg
-    if not input_file and output_path:
+        elif opt in ["-j", "--jobs"]:
+            try:
+                jobs = int(arg)
+            except ValueError:
+                usage()
+                sys.exit(2)
+        elif opt == "--cache-dir":
+            cache_path = arg
+        elif opt == "--no-cache":
+            use_cache = False
+        elif opt == "--incremental":
+            incremental = True
+        elif opt == "--renderer":
+            if arg not in RENDERERS:
+                usage()
+                sys.exit(2)
+            renderer_name = arg
+        elif opt == "--npz":
+            npz = True
+        elif opt == "--store":
+            store_path = arg
+        elif opt == "--from-store":
+            from_store = arg
+        elif opt == "--profile":
+            profiler = profiler or Profiler()
+        elif opt == "--profile-dump":
+            profiler = Profiler(arg)
+        elif opt == "--outputs":
+            outputs = arg.split(',')
+            if any(output not in OUTPUTS for output in outputs):
+                usage()
+                sys.exit(2)
+    if not (input_file or scan_path or from_store) and output_path:
         usage()
         sys.exit(2)
 
+    try:
+        renderer = make_renderer(renderer_name)
+    except ImportError as error:
+        print 'Error: %s, use --renderer R' % error
+        sys.exit(2)
+
     prepare_output_dir(output_path)
-    input_matrix = load_from_input(input_file)
-    launch(input_matrix, output_path)
+    cache = ParseCache(cache_path) if use_cache else None
+    store = ResultStore(store_path) if store_path else None
+    if from_store:
+        with stage(profiler, 'load'):
+            source = ResultStore(from_store)
+            input_matrix = source.load()
+            source.close()
+        verify_input_matrix(input_matrix)
+        launch(input_matrix, output_path, renderer, jobs, npz, profiler,
+               outputs)
+    else:
+        if scan_path:
+            with stage(profiler, 'scan'):
+                lines = scan(scan_path, cache.path if cache else None)
+            write_csv(lines, output_path + 'output/scanInput.tab')
+        else:
+            lines = read_input(input_file)
+        if incremental:
+            launch_incremental(lines, output_path, jobs, cache, renderer,
+                               npz, store, profiler, outputs)
+        else:
+            #the store replaces whole samples, so it needs every column
+            columns = output_columns(outputs) if store is None else None
+            input_matrix = load_rows(lines, jobs, cache, profiler, columns)
+            verify_input_matrix(input_matrix)
+            if store is not None:
+                with stage(profiler, 'store'):
+                    store.save(input_matrix)
+            launch(input_matrix, output_path, renderer, jobs, npz, profiler,
+                   outputs)
+    if store is not None:
+        store.close()
+    if profiler is not None:
+        profiler.write(output_path + 'output/profile.json')
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -0,0 +1,52 @@
+"""
+Fixture files and helpers shared by the tests
+"""
+
+from geecq.fastqc import Fastqc
+from geecq.sam import Sam
+from cStringIO import StringIO
+from contextlib import contextmanager
+import os
+import sys
+
+ROOTDIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_fastqc(name):
+    """Loads a fastqc fixture of the test folder
+
+    Args:
+        name: name of the file, e.g. 'fastqc_v10.txt'
+
+    Returns:
+        The loaded Fastqc object
+    """
+    fastqc = Fastqc()
+    fastqc.load_from_file(os.path.join(ROOTDIR, name))
+    return fastqc
+
+def load_sam(name):
+    """Loads a samstat fixture of the test folder
+
+    Args:
+        name: name of the file, e.g. 'samstat_v2.html'
+
+    Returns:
+        The loaded Sam object
+    """
+    sam = Sam()
+    sam.load_from_file(os.path.join(ROOTDIR, name))
+    return sam
+
+@contextmanager
+def captured_stdout():
+    """Keeps what is printed out of the test output
+
+    Yields:
+        The StringIO receiving the printed text
+    """
+    stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout = stdout
@@ -0,0 +1,72 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_cache
+from the main folder
+"""
+
+from geecq.cache import ParseCache
+from geecq.fastqc import Fastqc
+from test.fixtures import ROOTDIR, captured_stdout
+import unittest
+import os
+import shutil
+import tempfile
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.tempdir, 'cache'))
+        self.file_name = os.path.join(self.tempdir, 'fastqc_data.txt')
+        shutil.copy(ROOTDIR + '/fastqc_v10.txt', self.file_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_hit(self):
+        os.utime(self.file_name, (1000000000, 1000000000))
+        first = self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        #same size and mtime, only the cached object can have a name
+        size = os.path.getsize(self.file_name)
+        with open(self.file_name, 'w') as txt_file:
+            txt_file.write(' ' * size)
+        os.utime(self.file_name, (1000000000, 1000000000))
+        second = self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        self.assertIsNot(first, second)
+        self.assertEqual(first.name, second.name)
+        self.assertEqual(first.pos_quality, second.pos_quality)
+
+    def test_lazy(self):
+        first = self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        self.assertTrue(first.pending_)
+        second = self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        self.assertIsNot(first, second)
+        #the cached object only decodes its modules when they are used
+        self.assertEqual(sorted(second.pending_), sorted(first.pending_))
+        self.assertEqual(second.pos_quality, first.pos_quality)
+        self.assertEqual(second.dup, first.dup)
+        self.assertNotIn('pos_quality', second.pending_)
+
+    def test_stale(self):
+        self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        shutil.copy(ROOTDIR + '/fastqc_v11.txt', self.file_name)
+        fastqc = self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        self.assertEqual(fastqc.version, 11)
+
+    def test_prune(self):
+        self.cache.load(Fastqc(), self.file_name, 'load_from_file')
+        self.cache.max_size = 0
+        self.cache.prune()
+        self.assertEqual(os.listdir(self.cache.path), [])
+
+    def test_failed_load(self):
+        zip_name = os.path.join(self.tempdir, 'bad.zip')
+        with open(zip_name, 'w') as zip_file:
+            zip_file.write('not a zip archive')
+        with captured_stdout() as output:
+            self.cache.load(Fastqc(), zip_name, 'load_from_zip')
+            self.cache.load(Fastqc(), zip_name, 'load_from_zip')
+        self.assertEqual(output.getvalue().count('Could not open'), 2)
+        self.assertEqual(os.listdir(self.cache.path), [])
@@ -0,0 +1,32 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_cohort
+from the main folder
+"""
+
+from geecq.fastqc import Fastqc
+from geecq import cohort
+from test.fixtures import load_fastqc
+import unittest
+
+class TestCohort(unittest.TestCase):
+
+    @unittest.skipIf(cohort.numpy is None, 'numpy is not installed')
+    def test_short_stats(self):
+        fastqcs = [load_fastqc('fastqc_v10.txt'), Fastqc(),
+                   load_fastqc('fastqc_v11.txt')]
+        self.assertEqual(cohort.Cohort(fastqcs).short_stats(),
+                         [cohort.short_stats(fastqc) for fastqc in fastqcs])
+
+    @unittest.skipIf(cohort.numpy is None, 'numpy is not installed')
+    def test_lists(self):
+        fastqc = load_fastqc('fastqc_v10.txt')
+        expected = cohort.short_stats(fastqc)
+        #the setters accept lists, as the attributes were before arrays
+        fastqc.pos_quality = list(fastqc.pos_quality)
+        fastqc.qual = list(fastqc.qual)
+        fastqc.dup = list(fastqc.dup)
+        self.assertEqual(cohort.Cohort([fastqc, Fastqc()]).short_stats(),
+                         [expected, cohort.short_stats(Fastqc())])
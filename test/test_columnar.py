@@ -0,0 +1,89 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_columnar
+from the main folder
+"""
+
+from geecq.columnar import NpzWriter, TEXT_COLUMNS
+from geecq.fastqc import Fastqc
+from geecq.sam import Sam
+from geecq.meta import Meta
+from geecq.table import Table
+from geecq import cohort
+from test.fixtures import ROOTDIR, captured_stdout, load_fastqc, load_sam
+import unittest
+import os
+import shutil
+import tempfile
+
+class TestNpzWriter(unittest.TestCase):
+
+    @unittest.skipIf(cohort.numpy is None, 'numpy is not installed')
+    def test_load(self):
+        numpy = cohort.numpy
+        fastqc1 = load_fastqc('fastqc_v10.txt')
+        fastqc2 = load_fastqc('fastqc_v11.txt')
+        sam = load_sam('samstat_v2.html')
+        _, long_table = Table([[fastqc1, fastqc2, sam, Meta('dummy')],
+                               [Fastqc(), fastqc1, Sam(), Meta('dummy')]]
+                             ).make_tables()
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'tableLong.npz')
+            writer = NpzWriter(path)
+            for row in long_table:
+                writer.add(row)
+            writer.close()
+            npz = numpy.load(path)
+            metrics = npz['metrics']
+            levels = npz['levels']
+            names = list(npz['names'])
+        finally:
+            shutil.rmtree(tempdir)
+        columns = [i for i in range(len(long_table[0]))
+                   if i not in TEXT_COLUMNS]
+        self.assertEqual(metrics.shape, (2, len(columns)))
+        self.assertEqual(names, [row[0] for row in long_table[3:]])
+        self.assertEqual(list(levels[2]), [long_table[2][i] for i in columns])
+        self.assertEqual(levels[0][-1], 'MAPQ')
+        for row, values in zip(long_table[3:], metrics):
+            for i, value in zip(columns, values):
+                if row[i] == '-':
+                    self.assertTrue(numpy.isnan(value))
+                else:
+                    self.assertEqual(value, float(row[i]))
+
+    def test_discard(self):
+        with self.assertRaises(ValueError):
+            with NpzWriter(os.path.join(ROOTDIR, 'unused.npz')) as writer:
+                raise ValueError
+        self.assertFalse(os.path.exists(writer.metrics_path))
+        self.assertFalse(os.path.exists(os.path.join(ROOTDIR, 'unused.npz')))
+
+    @unittest.skipIf(cohort.numpy is None, 'numpy is not installed')
+    def test_row_width(self):
+        numpy = cohort.numpy
+        fastqc1 = load_fastqc('fastqc_v10.txt')
+        fastqc2 = load_fastqc('fastqc_v11.txt')
+        fastqc2.pos_quality = [30.0] * 5
+        _, long_table = Table([[fastqc1, Fastqc(), Sam(), Meta('dummy')],
+                               [fastqc2, Fastqc(), Sam(), Meta('dummy')]]
+                             ).make_tables()
+        tempdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tempdir, 'tableLong.npz')
+            with captured_stdout() as output:
+                with NpzWriter(path) as writer:
+                    for row in long_table:
+                        writer.add(row)
+            npz = numpy.load(path)
+            names = list(npz['names'])
+            shape = npz['metrics'].shape
+        finally:
+            shutil.rmtree(tempdir)
+        self.assertIn('Could not add sample ' + fastqc2.name,
+                      output.getvalue())
+        self.assertEqual(names, [fastqc1.name])
+        self.assertEqual(shape, (1, len(long_table[0]) - len(TEXT_COLUMNS)))
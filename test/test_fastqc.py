@@ -6,12 +6,26 @@ python -m unittest test.test_fastqc
 from the main folder
 """
 
-from geecq.fastqc import Fastqc
+from geecq.fastqc import Fastqc, LengthDistribution
+import cPickle as pickle
 import unittest
 import os
+import tempfile
+import threading
+import time
 
 ROOTDIR = os.path.dirname(__file__)
 
+class SlowFastqc(Fastqc):
+    """Fastqc whose Sequence Length Distribution takes a while to decode
+    """
+    __slots__ = ()
+
+    def load_length_(self, module):
+        time.sleep(0.05)
+        Fastqc.load_length_(self, module)
+
+
 class TestFastqc(unittest.TestCase):
 
     def is_loaded(self, fastqc):
@@ -29,6 +43,15 @@ class TestFastqc(unittest.TestCase):
         fastqc.load_from_string(open(ROOTDIR + '/fastqc_v10.txt', 'r').read())
         self.is_loaded(fastqc)
 
+    def test_load_from_stream(self):
+        fastqc = Fastqc()
+        with open(ROOTDIR + '/fastqc_v11.txt', 'r') as txt_file:
+            fastqc.load_from_stream(txt_file)
+        self.is_loaded(fastqc)
+        self.assertEqual(fastqc.version, 11)
+        self.assertEqual(fastqc.nb_sequences, 7014839)
+        self.assertEqual(len(fastqc.dup), 11)
+
     def test_load_from_file(self):
         fastqc = Fastqc()
         fastqc.load_from_file(ROOTDIR + '/fastqc_v10.txt')
@@ -38,3 +61,70 @@ class TestFastqc(unittest.TestCase):
         fastqc = Fastqc()
         fastqc.load_from_zip(ROOTDIR + '/fastqc_v10.zip')
         self.is_loaded(fastqc)
+
+    def test_pickle(self):
+        fastqc = Fastqc()
+        fastqc.load_from_file(ROOTDIR + '/fastqc_v10.txt')
+        copy = pickle.loads(pickle.dumps(fastqc, pickle.HIGHEST_PROTOCOL))
+        self.assertFalse(hasattr(copy, '__dict__'))
+        self.assertEqual(copy.pos_quality, fastqc.pos_quality)
+        self.assertEqual(list(copy.seq_length), list(fastqc.seq_length))
+        self.assertEqual(copy.dup.typecode, 'd')
+
+    def test_load_from_empty_file(self):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            fastqc = Fastqc()
+            fastqc.load_from_file(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(fastqc.name, '')
+        self.assertFalse(fastqc.dup)
+
+    def test_version_only(self):
+        fastqc = Fastqc()
+        fastqc.load_from_buffer('##FastQC\t0.11.2')
+        self.assertEqual(fastqc.version, 11)
+
+    def test_lazy(self):
+        fastqc = Fastqc()
+        fastqc.load_from_zip(ROOTDIR + '/fastqc_v10.zip')
+        self.assertTrue(fastqc.name)
+        self.assertEqual(sorted(fastqc.pending_),
+                         ['dup', 'pos_quality', 'qual', 'seq_length'])
+        self.assertTrue(fastqc.qual)
+        self.assertNotIn('qual', fastqc.pending_)
+        copy = pickle.loads(pickle.dumps(fastqc, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(sorted(copy.pending_),
+                         ['dup', 'pos_quality', 'seq_length'])
+        self.assertEqual(copy.qual, fastqc.qual)
+        self.assertEqual(copy.dup, fastqc.dup)
+        self.assertEqual(list(copy.seq_length), list(fastqc.seq_length))
+
+    def test_shared_between_threads(self):
+        fastqc = SlowFastqc()
+        fastqc.load_from_file(ROOTDIR + '/fastqc_v11.txt')
+        lengths = []
+        threads = [threading.Thread(
+            target=lambda: lengths.append(list(fastqc.seq_length)))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = Fastqc()
+        expected.load_from_file(ROOTDIR + '/fastqc_v11.txt')
+        self.assertEqual(lengths, [list(expected.seq_length)] * 2)
+
+    def test_length_distribution(self):
+        seq_length = LengthDistribution()
+        seq_length.add(40, 4.0)
+        seq_length.add(35, 2.0)
+        seq_length.add(39, 2.0)
+        self.assertEqual(seq_length.min_length, 35)
+        self.assertEqual(seq_length.max_length(), 40)
+        self.assertEqual(seq_length.get(39), 2.0)
+        self.assertEqual(seq_length.get(36), None)
+        self.assertEqual(seq_length.get(100, 0), 0)
+        self.assertEqual(list(seq_length), [[35, 2.0], [39, 2.0], [40, 4.0]])
@@ -0,0 +1,54 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_graph
+from the main folder
+"""
+
+from geecq.graph import GraphMaker, render_graphs
+from geecq.fastqc import Fastqc
+from geecq.render import r_script
+from test.fixtures import load_fastqc
+import unittest
+
+class DummyRenderer(object):
+    def __init__(self, batch=False):
+        self.batch = batch
+        self.groups = []
+
+    def draw(self, plots):
+        self.groups.append(plots)
+        return dict((plot.path, ('ok', 0.0)) for plot in plots)
+
+class TestGraphMaker(unittest.TestCase):
+
+    def setUp(self):
+        fastqc1 = load_fastqc('fastqc_v10.txt')
+        fastqc2 = load_fastqc('fastqc_v11.txt')
+        self.fastqc_list = [fastqc1, Fastqc(), fastqc2]
+
+    def test_plots(self):
+        renderer = DummyRenderer()
+        statuses = GraphMaker(self.fastqc_list, 'out/',
+                              renderer).generate_all()
+        self.assertEqual(len(renderer.groups), 1)
+        self.assertEqual(len(statuses), 4)
+        for plot in renderer.groups[0]:
+            self.assertEqual(len(plot.columns), len(plot.names))
+            self.assertTrue(all(len(column) == 2 for column in plot.columns))
+            self.assertIn("png('%s.png')" % plot.path,
+                          r_script(plot, 0, 'data.bin'))
+
+    def test_render_graphs(self):
+        for batch, nb_groups in [(False, 8), (True, 3)]:
+            renderer = DummyRenderer(batch)
+            graph_makers = [GraphMaker(self.fastqc_list, 'before/', renderer),
+                            GraphMaker(self.fastqc_list, 'after/', renderer)]
+            statuses = render_graphs(graph_makers, renderer, 3)
+            self.assertEqual(len(renderer.groups), nb_groups)
+            self.assertEqual([status[0] for status in statuses],
+                             [plot.path for graph_maker in graph_makers
+                              for plot in graph_maker.plots()])
+            self.assertTrue(all(status[1:] == ('ok', 0.0)
+                                for status in statuses))
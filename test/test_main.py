@@ -0,0 +1,206 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_main
+from the main folder
+"""
+
+from test.fixtures import ROOTDIR, captured_stdout
+import main
+import unittest
+import os
+import shutil
+import tempfile
+
+class DummyRenderer(object):
+    batch = False
+
+    def __init__(self):
+        self.paths = []
+
+    def draw(self, plots):
+        self.paths.extend(plot.path for plot in plots)
+        return dict((plot.path, ('ok', 0.0)) for plot in plots)
+
+def drawn_sides(renderer):
+    return sorted(set(path.split('/')[-2] for path in renderer.paths))
+
+class TestLoadRows(unittest.TestCase):
+
+    def test_jobs(self):
+        lines = [[ROOTDIR + '/fastqc_v11.txt', 'N/A',
+                  ROOTDIR + '/samstat_v1.html', 'N/A'],
+                 [ROOTDIR + '/missing.txt', ROOTDIR + '/fastqc_v10.zip',
+                  'N/A', ROOTDIR + '/series.soft#GSM0002'],
+                 [ROOTDIR + '/fastqc_v10.txt', ROOTDIR + '/fastqc_v11.txt',
+                  ROOTDIR + '/samstat_v2.html', 'N/A']]
+        with captured_stdout() as output:
+            serial = main.load_rows(lines)
+            rows = main.load_rows(lines, jobs=2)
+        self.assertIn('Line 2: could not open ' + ROOTDIR + '/missing.txt',
+                      output.getvalue())
+        self.assertEqual(rows[1][0].name, '')
+        self.assertEqual(rows[1][3].name, 'GSM0002')
+        self.assertEqual([[obj.name for obj in row] for row in rows],
+                         [[obj.name for obj in row] for row in serial])
+        self.assertEqual([row[0].version for row in rows], [11, 0, 10])
+
+    def test_jobs_exit(self):
+        #a fastqc file is not a valid samstat file, the parser exits
+        lines = [[ROOTDIR + '/fastqc_v10.txt', 'N/A',
+                  ROOTDIR + '/fastqc_v11.txt', 'N/A'],
+                 [ROOTDIR + '/fastqc_v11.txt', 'N/A', 'N/A', 'N/A']]
+        with captured_stdout():
+            with self.assertRaises(SystemExit):
+                main.load_rows(lines, jobs=2)
+
+class TestIncremental(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.output_path = os.path.join(self.tempdir, 'incremental') + '/'
+        main.prepare_output_dir(self.output_path)
+        self.renderer = DummyRenderer()
+        data = os.path.join(self.tempdir, 'data')
+        os.makedirs(data)
+        for name in ['fastqc_v10.txt', 'fastqc_v11.txt', 'samstat_v2.html']:
+            shutil.copy(os.path.join(ROOTDIR, name), data)
+        self.line1 = [data + '/fastqc_v10.txt', 'N/A', 'N/A', 'N/A']
+        self.line2 = [data + '/fastqc_v11.txt', 'N/A',
+                      data + '/samstat_v2.html', 'N/A']
+        self.load_rows = main.load_rows
+        self.loaded = []
+
+        def load_rows(lines, *args, **kwargs):
+            self.loaded.extend(lines)
+            return self.load_rows(lines, *args, **kwargs)
+
+        main.load_rows = load_rows
+
+    def tearDown(self):
+        main.load_rows = self.load_rows
+        shutil.rmtree(self.tempdir)
+
+    def tables(self, output_path):
+        return (main.read_csv(output_path + 'output/tableShort.tab'),
+                main.read_csv(output_path + 'output/tableLong.tab'))
+
+    def expected(self, lines):
+        output_path = os.path.join(self.tempdir, 'full') + '/'
+        main.prepare_output_dir(output_path)
+        with captured_stdout():
+            main.launch(self.load_rows(lines), output_path,
+                        outputs=['short', 'long'])
+        return self.tables(output_path)
+
+    def incremental(self, lines, outputs=('short', 'long')):
+        self.loaded = []
+        self.renderer.paths = []
+        with captured_stdout():
+            main.launch_incremental(lines, self.output_path,
+                                    renderer=self.renderer, outputs=outputs)
+        self.assertEqual(self.tables(self.output_path), self.expected(lines))
+        return self.loaded
+
+    def test_unchanged(self):
+        lines = [self.line1, self.line2]
+        self.assertEqual(self.incremental(lines), lines)
+        self.assertEqual(self.incremental(lines), [])
+
+    def test_changed(self):
+        lines = [self.line1, self.line2]
+        self.incremental(lines)
+        shutil.copy(os.path.join(ROOTDIR, 'fastqc_v11.txt'), self.line1[0])
+        self.assertEqual(self.incremental(lines), [self.line1])
+
+    def test_added_removed(self):
+        self.incremental([self.line1])
+        self.assertEqual(self.incremental([self.line1, self.line2]),
+                         [self.line2])
+        self.assertEqual(self.incremental([self.line2]), [])
+
+    def test_repad(self):
+        self.incremental([self.line1])
+        width = len(self.tables(self.output_path)[1][0])
+        self.assertEqual(self.incremental([self.line2, self.line1]),
+                         [self.line2])
+        #the reused row is fitted to the columns of the new row
+        self.assertNotEqual(len(self.tables(self.output_path)[1][0]), width)
+
+    def test_full_run_between(self):
+        lines = [self.line1, self.line2]
+        self.incremental(lines)
+        with captured_stdout():
+            main.launch(self.load_rows(lines[::-1]), self.output_path,
+                        outputs=['short', 'long'])
+        self.assertFalse(os.path.exists(self.output_path + 'output/' +
+                                        main.MANIFEST))
+        self.assertEqual(self.incremental(lines), lines)
+
+    def test_other_rows(self):
+        lines = [self.line1, self.line2]
+        self.incremental(lines)
+        #tables whose rows do not match the manifest are not reused
+        short_table, long_table = self.tables(self.output_path)
+        main.write_csv(short_table[:1] + short_table[:0:-1],
+                       self.output_path + 'output/tableShort.tab')
+        main.write_csv(long_table[:3] + long_table[:2:-1],
+                       self.output_path + 'output/tableLong.tab')
+        self.assertEqual(self.incremental(lines), lines)
+
+    def test_graphs(self):
+        lines = [[self.line1[0], self.line2[0], 'N/A', 'N/A']]
+        self.incremental(lines, ['short'])
+        self.assertEqual(self.renderer.paths, [])
+        self.incremental(lines, ['graphs-before'])
+        self.assertEqual(drawn_sides(self.renderer), ['before'])
+        self.incremental(lines, ['graphs-before'])
+        self.assertEqual(self.renderer.paths, [])
+        self.incremental(lines, main.OUTPUTS)
+        self.assertEqual(drawn_sides(self.renderer), ['after'])
+        #the graphs of both sides are out of date once a row changed
+        shutil.copy(os.path.join(ROOTDIR, 'fastqc_v11.txt'), self.line1[0])
+        self.incremental(lines, ['graphs-before'])
+        self.assertEqual(drawn_sides(self.renderer), ['before'])
+        self.incremental(lines, ['graphs-after'])
+        self.assertEqual(drawn_sides(self.renderer), ['after'])
+
+class TestOutputs(unittest.TestCase):
+
+    def test_columns(self):
+        self.assertEqual(main.output_columns(main.OUTPUTS), [0, 1, 2, 3])
+        self.assertEqual(main.output_columns(['graphs-after']), [1])
+        self.assertEqual(main.output_columns(['graphs-before',
+                                              'graphs-after']), [0, 1])
+        self.assertEqual(main.graph_sides(['long', 'graphs-after']), [1])
+        self.assertEqual(main.graph_sides(main.OUTPUTS), [0, 1])
+        self.assertEqual(main.graph_sides(['short']), [])
+
+    def test_row_files(self):
+        line = [ROOTDIR + '/fastqc_v10.txt', ROOTDIR + '/fastqc_v11.txt',
+                ROOTDIR + '/samstat_v2.html', 'N/A']
+        with captured_stdout():
+            row = main.load_rows([line], columns=[1])[0]
+        self.assertEqual([bool(obj.name) for obj in row[:3]],
+                         [False, True, False])
+
+    def test_launch(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            output_path = tempdir + '/'
+            main.prepare_output_dir(output_path)
+            line = [ROOTDIR + '/fastqc_v10.txt', ROOTDIR + '/fastqc_v11.txt',
+                    'N/A', 'N/A']
+            renderer = DummyRenderer()
+            with captured_stdout():
+                outputs = ['short', 'graphs-after']
+                rows = main.load_rows([line],
+                                      columns=main.output_columns(outputs))
+                main.launch(rows, output_path, renderer, outputs=outputs)
+            files = os.listdir(output_path + 'output')
+        finally:
+            shutil.rmtree(tempdir)
+        self.assertIn('tableShort.tab', files)
+        self.assertNotIn('tableLong.tab', files)
+        self.assertEqual(drawn_sides(renderer), ['after'])
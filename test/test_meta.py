@@ -0,0 +1,40 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_meta
+from the main folder
+"""
+
+from geecq.meta import Meta, MetaSeries, split_series_path
+from test.fixtures import ROOTDIR
+import unittest
+
+class TestMeta(unittest.TestCase):
+
+    def test_load_from_string(self):
+        meta = Meta('')
+        meta.load_from_string('^SAMPLE = GSM0001\n'
+                              '!Sample_title = H3K4me3\n'
+                              '!Sample_characteristics_ch1 = a\n'
+                              '!Sample_characteristics_ch1 = b\n')
+        self.assertEqual(meta.name, 'GSM0001')
+        self.assertEqual(meta.meta, {'title': 'H3K4me3',
+                                     'characteristics_ch1': 'ab'})
+
+    def test_load_series(self):
+        series = MetaSeries()
+        series.load_from_file(ROOTDIR + '/series.soft')
+        self.assertEqual(sorted(series.samples), ['GSM0001', 'GSM0002'])
+        meta = series.samples['GSM0001']
+        self.assertEqual(meta.name, 'GSM0001')
+        self.assertEqual(meta.meta['title'], 'H3K4me3 ChIP-seq')
+        self.assertEqual(meta.meta['characteristics_ch1'],
+                         'cell type: HeLachip antibody: H3K4me3')
+        self.assertEqual(series.samples['GSM0002'].meta['title'], 'Input')
+
+    def test_split_series_path(self):
+        self.assertEqual(split_series_path(ROOTDIR + '/series.soft#GSM0002'),
+                         (ROOTDIR + '/series.soft', 'GSM0002'))
+        self.assertEqual(split_series_path(ROOTDIR + '/series.soft'),
+                         (ROOTDIR + '/series.soft', None))
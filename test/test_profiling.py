@@ -0,0 +1,81 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_profiling
+from the main folder
+"""
+
+from geecq.profiling import Profiler, stage
+import geecq.profiling as profiling
+from test.fixtures import captured_stdout
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_stage(self):
+        profiler = Profiler(os.path.join(self.path, 'dump'))
+        with stage(profiler, 'short table'):
+            sum(range(1000))
+        with stage(None, 'ignored'):
+            pass
+        self.assertEqual([entry['stage'] for entry in profiler.stages],
+                         ['short table'])
+        self.assertGreaterEqual(profiler.stages[0]['wall'], 0)
+        self.assertTrue(os.path.exists(os.path.join(self.path, 'dump',
+                                                    'short_table.prof')))
+
+    @unittest.skipUnless('VmHWM' in profiling.memory_status() and
+                         profiling.reset_peak_rss(),
+                         'the peak memory cannot be reset')
+    def test_stage_peak(self):
+        profiler = Profiler()
+        with stage(profiler, 'large'):
+            large = ' ' * (64 << 20)
+        del large
+        with stage(profiler, 'small'):
+            sum(range(1000))
+        large, small = profiler.stages
+        self.assertEqual(small['peak_rss_scope'], 'stage')
+        #the peak of a stage does not carry the peak of the previous one
+        self.assertGreater(large['peak_rss_kb'] - small['peak_rss_kb'],
+                           32 << 10)
+        self.assertGreater(large['rss_growth_kb'], 32 << 10)
+
+    def test_stage_no_proc(self):
+        status = profiling.STATUS
+        profiling.STATUS = os.path.join(self.path, 'missing')
+        try:
+            profiler = Profiler()
+            with stage(profiler, 'load'):
+                pass
+        finally:
+            profiling.STATUS = status
+        self.assertEqual(profiler.stages[0]['peak_rss_scope'], 'process')
+        self.assertIsNone(profiler.stages[0]['rss_growth_kb'])
+        self.assertGreater(profiler.stages[0]['peak_rss_kb'], 0)
+
+    def test_write(self):
+        profiler = Profiler()
+        profiler.record_file('a.txt', 'load_from_file', 0.5, 0.4)
+        profiler.record_file('b.zip', 'load_from_zip', 2.0, 1.5)
+        report_path = os.path.join(self.path, 'profile.json')
+        with captured_stdout() as output:
+            profiler.write(report_path)
+        self.assertIn('b.zip', output.getvalue())
+        with open(report_path) as report_file:
+            report = json.load(report_file)
+        self.assertEqual([entry['path'] for entry in report['slowest_files']],
+                         ['b.zip', 'a.txt'])
+        self.assertEqual(profiler.slowest_files(1)[0]['loader'],
+                         'load_from_zip')
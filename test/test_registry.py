@@ -0,0 +1,42 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_registry
+from the main folder
+"""
+
+from geecq.registry import LoadRegistry
+from geecq.fastqc import Fastqc
+from geecq.meta import Meta
+from test.fixtures import ROOTDIR
+import unittest
+
+class TestLoadRegistry(unittest.TestCase):
+
+    def test_shared(self):
+        registry = LoadRegistry()
+        paths = [ROOTDIR + '/fastqc_v10.txt',
+                 ROOTDIR + '/../test/fastqc_v10.txt',
+                 ROOTDIR + '/fastqc_v11.txt']
+        for path in paths:
+            registry.add(Fastqc, path, 'load_from_file')
+        registry.add(Meta, ROOTDIR + '/series.soft', 'load_from_file', 'a')
+        registry.load()
+        self.assertIs(registry.get(Fastqc, paths[0], 'load_from_file'),
+                      registry.get(Fastqc, paths[1], 'load_from_file'))
+        self.assertEqual(registry.get(Fastqc, paths[2],
+                                      'load_from_file').version, 11)
+        self.assertEqual(registry.saved(), 1)
+
+    def test_decode(self):
+        #the objects of the pool workers come back decoded
+        for jobs, pending in [(1, 4), (2, 0)]:
+            registry = LoadRegistry()
+            for name in ['fastqc_v10.txt', 'fastqc_v11.txt']:
+                registry.add(Fastqc, ROOTDIR + '/' + name, 'load_from_file')
+            registry.load(jobs)
+            fastqc = registry.get(Fastqc, ROOTDIR + '/fastqc_v10.txt',
+                                  'load_from_file')
+            self.assertEqual(len(fastqc.pending_), pending)
+            self.assertEqual(len(fastqc.pos_quality), 36)
@@ -32,3 +32,28 @@ class TestSam(unittest.TestCase):
         sam = Sam()
         sam.load_from_file(ROOTDIR + '/samstat_v2.html')
         self.is_loaded(sam)
+
+    def test_mapq(self):
+        sam = Sam()
+        sam.load_from_file(ROOTDIR + '/samstat_v1.html')
+        self.assertEqual(sam.name, 'SRR217326')
+        self.assertEqual(sam.mapq[0], [96.8, 10988799])
+        self.assertEqual(sam.mapq[-1], [0.1, 14969])
+        sam = Sam()
+        sam.load_from_file(ROOTDIR + '/samstat_v2.html')
+        self.assertEqual(sam.mapq[0], [88.9, 6235750])
+        self.assertEqual(sam.mapq[-1], [10.5, 735677])
+        self.assertEqual(len(sam.mapq), 6)
+
+    def test_load_from_buffer(self):
+        expected = {'/samstat_v1.html': [[96.8, 10988799], [2.1, 243302],
+                                         [0.1, 16616], [0.0, 2893],
+                                         [0.7, 80661], [0.1, 14969]],
+                    '/samstat_v2.html': [[88.9, 6235750], [0.2, 12486],
+                                         [0.2, 11798], [0.3, 17785],
+                                         [0.0, 1343], [10.5, 735677]]}
+        for name, mapq in expected.items():
+            sam = Sam()
+            with open(ROOTDIR + name, 'r') as sam_file:
+                sam.load_from_buffer(sam_file.read())
+            self.assertEqual(sam.mapq, mapq)
@@ -0,0 +1,79 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_scan
+from the main folder
+"""
+
+import geecq.scan as scan
+import unittest
+import os
+import shutil
+import tempfile
+
+class TestScan(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tempdir, 'data')
+        for path in ['raw/S1_fastqc.zip', 'trimmed/S1_trimmed_fastqc.zip',
+                     'raw/S2_fastqc/fastqc_data.txt', 'sam/S1.sam.html',
+                     'meta/S2.soft', 'raw/S2_fastqc/fastqc_report.html']:
+            path = os.path.join(self.root, path)
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            open(path, 'w').close()
+        self.expected = [
+            [self.root + '/raw/S1_fastqc.zip',
+             self.root + '/trimmed/S1_trimmed_fastqc.zip',
+             self.root + '/sam/S1.sam.html', 'N/A'],
+            [self.root + '/raw/S2_fastqc/fastqc_data.txt', 'N/A', 'N/A',
+             self.root + '/meta/S2.soft']]
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_sample_name(self):
+        self.assertEqual(scan.sample_name('SRR1_trimmed_fastqc.zip'), 'SRR1')
+        self.assertEqual(scan.sample_name('SRR1.sam.html'), 'SRR1')
+        self.assertEqual(scan.sample_name('SRR1_2.fastq.gz'), 'SRR1.1')
+
+    def test_scan(self):
+        self.assertEqual(scan.scan(self.root), self.expected)
+        scandir = scan.scandir
+        scan.scandir = None
+        try:
+            self.assertEqual(scan.scan(self.root), self.expected)
+        finally:
+            scan.scandir = scandir
+
+    def test_cache(self):
+        self.assertEqual(scan.scan(self.root, self.tempdir), self.expected)
+        listed = []
+        list_dir = scan.list_dir
+        scan.list_dir = lambda path: listed.append(path) or list_dir(path)
+        try:
+            os.remove(os.path.join(self.root, 'meta/S2.soft'))
+            self.assertEqual(scan.scan(self.root, self.tempdir)[1][3], 'N/A')
+        finally:
+            scan.list_dir = list_dir
+        self.assertEqual(listed, [os.path.join(self.root, 'meta')])
+
+    def test_untrimmed(self):
+        self.assertEqual(scan.file_column('untrimmed/S1_fastqc.zip'),
+                         (0, 'S1'))
+        self.assertEqual(scan.file_column('raw/S1_untrimmed_fastqc.zip'),
+                         (0, 'S1'))
+        self.assertEqual(scan.file_column('raw/S1.trimmed_fastqc.zip'),
+                         (1, 'S1'))
+
+    def test_series(self):
+        series_path = os.path.join(self.root, 'meta/GSE0001_family.soft')
+        shutil.copy(os.path.join(os.path.dirname(__file__), 'series.soft'),
+                    series_path)
+        open(os.path.join(self.root, 'raw/GSM0002_fastqc.zip'), 'w').close()
+        self.assertEqual(scan.scan(self.root), [
+            ['N/A', 'N/A', 'N/A', series_path + '#GSM0001'],
+            [self.root + '/raw/GSM0002_fastqc.zip', 'N/A', 'N/A',
+             series_path + '#GSM0002']] + self.expected)
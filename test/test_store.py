@@ -0,0 +1,47 @@
+"""
+use
+python -m unittest discover
+or
+python -m unittest test.test_store
+from the main folder
+"""
+
+from geecq.store import ResultStore
+from geecq.fastqc import Fastqc
+from geecq.sam import Sam
+from geecq.meta import Meta, MetaSeries
+from geecq.table import Table
+from test.fixtures import ROOTDIR, captured_stdout, load_fastqc, load_sam
+import unittest
+
+class TestResultStore(unittest.TestCase):
+
+    def test_round_trip(self):
+        fastqc1 = load_fastqc('fastqc_v10.txt')
+        fastqc2 = load_fastqc('fastqc_v11.txt')
+        sam = load_sam('samstat_v2.html')
+        series = MetaSeries()
+        series.load_from_file(ROOTDIR + '/series.soft')
+        rows = [[fastqc1, fastqc2, sam, series.samples['GSM0001']],
+                [Fastqc(), fastqc2, Sam(), series.samples['GSM0002']]]
+        store = ResultStore(':memory:')
+        store.save(rows)
+        store.save(rows[:1])
+        self.assertEqual(store.names(), [fastqc2.name, fastqc1.name])
+        names = [fastqc1.name, fastqc2.name]
+        self.assertEqual(Table.from_store(store, names).make_tables(),
+                         Table(rows).make_tables())
+        store.close()
+
+    def test_duplicate_names(self):
+        fastqc1 = load_fastqc('fastqc_v10.txt')
+        fastqc2 = load_fastqc('fastqc_v11.txt')
+        store = ResultStore(':memory:')
+        with captured_stdout() as output:
+            store.save([[fastqc1, Fastqc(), Sam(), Meta('')],
+                        [fastqc1, fastqc2, Sam(), Meta('')],
+                        [Fastqc(), Fastqc(), Sam(), Meta('')]])
+        self.assertEqual(store.names(), [fastqc1.name])
+        self.assertEqual(len(store.load()[0][1].pos_quality), 0)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+        store.close()
@@ -6,7 +6,8 @@ python -m unittest test.test_table
 from the main folder
 """
 
-from geecq.table import Table
+from geecq.table import Table, TableLayout, repad_long_row
+import geecq.table
 from geecq.fastqc import Fastqc
 from geecq.sam import Sam
 from geecq.meta import Meta
@@ -27,3 +28,44 @@ class TestTable(unittest.TestCase):
         short_table, long_table = Table([[fastqc1, fastqc2, sam, meta]]).make_tables()
         self.assertTrue(all(len(row) == len(short_table[0]) for row in short_table))
         self.assertTrue(all(len(row) == len(long_table[0]) for row in long_table))
+
+    def test_missing_fastqc(self):
+        fastqc1 = Fastqc()
+        fastqc1.load_from_file(ROOTDIR + '/fastqc_v10.txt')
+        _, long_table = Table([[fastqc1, Fastqc(), Sam(),
+                                Meta('dummy')]]).make_tables()
+        self.assertEqual(len(long_table[3]), len(long_table[0]))
+
+    def test_repad_long_row(self):
+        fastqc1 = Fastqc()
+        fastqc1.load_from_file(ROOTDIR + '/fastqc_v10.txt')
+        fastqc2 = Fastqc()
+        fastqc2.load_from_file(ROOTDIR + '/fastqc_v11.txt')
+        row1 = [fastqc1, Fastqc(), Sam(), Meta('dummy')]
+        row2 = [Fastqc(), fastqc2, Sam(), Meta('dummy')]
+        _, alone = Table([row1]).make_tables()
+        _, both = Table([row1, row2]).make_tables()
+        layout = TableLayout.from_matched_lists([row1, row2])
+        self.assertNotEqual(TableLayout.from_row(row1), layout)
+        self.assertEqual(repad_long_row(alone[3], TableLayout.from_row(row1),
+                                        layout), both[3])
+
+    def test_iter_short(self):
+        fastqc1 = Fastqc()
+        fastqc1.load_from_file(ROOTDIR + '/fastqc_v10.txt')
+        fastqc2 = Fastqc()
+        fastqc2.load_from_file(ROOTDIR + '/fastqc_v11.txt')
+        rows = [[fastqc1, fastqc2, Sam(), Meta('dummy')],
+                [fastqc2, Fastqc(), Sam(), Meta('dummy')],
+                [Fastqc(), fastqc1, Sam(), Meta('dummy')]]
+        short_table, _ = Table(rows).make_tables()
+        block = geecq.table.STATS_BLOCK
+        geecq.table.STATS_BLOCK = 2
+        try:
+            table = Table(rows)
+            self.assertEqual(list(table.iter_short()), short_table)
+        finally:
+            geecq.table.STATS_BLOCK = block
+        #the layout is only needed by the long table
+        self.assertIsNone(table.layout_)
+        self.assertEqual(table.layout.min_length, 22)